@@ -0,0 +1,269 @@
+"""Benchmarks of id3manager hot paths.
+
+Each benchmark is timed with `timeit`, the best of several repeats is kept,
+and results are written as JSON so that they could be compared between
+releases, e.g.:
+
+    $ python benchmarks/bench.py -o baseline.json
+    $ git checkout feature-branch
+    $ python benchmarks/bench.py -o current.json --compare baseline.json
+
+When comparing, benchmarks that got slower than the threshold (20% by
+default) are reported, and the exit code is 1.
+"""
+
+import argparse
+import atexit
+import importlib.metadata
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import timeit
+import typing as t
+
+import mutagen.id3 as id3
+
+from id3manager import metadata
+from id3manager.formats import get_metadata_formatter, get_supported_formats
+from id3manager.formats import text as text_format
+from id3manager.formats import toml as toml_format
+
+HERE = os.path.abspath(os.path.dirname(__file__))
+TESTDATA = os.path.join(HERE, os.pardir, "tests", "testdata")
+
+CHAPTERS = [10, 100, 1000, 10000]
+# CTOC stores the number of its children in a single byte, so tags with more
+# than 255 chapters can't be saved.
+SAVED_CHAPTERS = [10, 100, 255]
+PICTURE_SIZES = [10 * 1024, 1024 * 1024, 10 * 1024 * 1024]
+
+BENCHMARKS = {}
+
+
+def benchmark(name: str, params: t.Iterable[t.Any]):
+    """Register a benchmark, a function returning a callable to time."""
+
+    def decorator(fn):
+        for param in params:
+            BENCHMARKS[f"{name}[{param}]"] = (fn, param)
+        return fn
+
+    return decorator
+
+
+def make_frames(chapters: int) -> t.List[id3.Frame]:
+    frames = [
+        id3.TIT2(text=["Обробка помилок"]),
+        id3.TPE1(text=["Ігор, Роман"]),
+        id3.TRCK(text=["14/14"]),
+        id3.TALB(text=["Шо по коду?"]),
+        id3.TDRC(text=["2022-11-27"]),
+        id3.TCON(text=["Podcast"]),
+    ]
+    parts = [
+        id3.CHAP(start_time=idx * 1000, sub_frames=[id3.TIT2(text=[f"Розділ {idx}"])])
+        for idx in range(chapters)
+    ]
+    return frames + metadata.chapters_from_parts(parts, chapters + 1)
+
+
+def make_picture(size: int) -> id3.APIC:
+    return id3.APIC(
+        mime="image/png", type=id3.PictureType.COVER_FRONT, data=os.urandom(size)
+    )
+
+
+def _format_benchmarks(format: str) -> None:
+    @benchmark(f"{format}.write", CHAPTERS)
+    def bench_write(chapters):
+        frames = make_frames(chapters)
+        formatter = get_metadata_formatter(format)
+        return lambda: formatter.write(io.StringIO(), frames)
+
+    @benchmark(f"{format}.read", CHAPTERS)
+    def bench_read(chapters):
+        fileobj = io.StringIO()
+        formatter = get_metadata_formatter(format)
+        formatter.write(fileobj, make_frames(chapters))
+        document = fileobj.getvalue()
+        return lambda: formatter.read(io.StringIO(document))
+
+    @benchmark(f"{format}.write_picture", PICTURE_SIZES)
+    def bench_write_picture(size):
+        frames = [make_picture(size)]
+        formatter = get_metadata_formatter(format)
+        return lambda: formatter.write(io.StringIO(), frames)
+
+    @benchmark(f"{format}.read_picture", PICTURE_SIZES)
+    def bench_read_picture(size):
+        fileobj = io.StringIO()
+        formatter = get_metadata_formatter(format)
+        formatter.write(fileobj, [make_picture(size)])
+        document = fileobj.getvalue()
+        return lambda: formatter.read(io.StringIO(document))
+
+
+for _format in get_supported_formats():
+    _format_benchmarks(_format)
+
+
+@benchmark("chapters_from_parts", CHAPTERS)
+def bench_chapters_from_parts(chapters):
+    parts = [
+        id3.CHAP(start_time=idx * 1000, sub_frames=[id3.TIT2(text=[f"Розділ {idx}"])])
+        for idx in range(chapters)
+    ]
+    return lambda: metadata.chapters_from_parts(parts, chapters + 1)
+
+
+@benchmark("text.unparse_apic", PICTURE_SIZES)
+def bench_text_unparse_apic(size):
+    frame = make_picture(size)
+    return lambda: text_format.unparse_apic(frame)
+
+
+@benchmark("text.parse_apic", PICTURE_SIZES)
+def bench_text_parse_apic(size):
+    value = text_format.unparse_apic(make_picture(size))
+    return lambda: text_format.parse_apic(value)
+
+
+@benchmark("toml.unparse_apic", PICTURE_SIZES)
+def bench_toml_unparse_apic(size):
+    # Pictures are base64-encoded when the table is written, not when it's
+    # built, so both are timed.
+    frame = make_picture(size)
+    return lambda: toml_format._write_table(
+        io.StringIO(), "APIC", toml_format.unparse_apic(frame)
+    )
+
+
+@benchmark("toml.parse_apic", PICTURE_SIZES)
+def bench_toml_parse_apic(size):
+    fileobj = io.StringIO()
+    toml_format.TomlMetadataFormatter().write(fileobj, [make_picture(size)])
+    value = toml_format.tomllib.loads(fileobj.getvalue())["APIC"][0]
+    return lambda: toml_format.parse_apic(value)
+
+
+@benchmark("ID3SourceFrameOrder._write", SAVED_CHAPTERS)
+def bench_write_tags(chapters):
+    from mutagen.id3._util import ID3SaveConfig
+
+    tags = metadata.ID3SourceFrameOrder()
+    for frame in make_frames(chapters):
+        tags.add(frame)
+    config = ID3SaveConfig(v2_version=4, v23_separator="/")
+    return lambda: tags._write(config)
+
+
+@benchmark("ID3SourceFrameOrder.save", SAVED_CHAPTERS)
+def bench_save_tags(chapters):
+    directory = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    audio = os.path.join(directory, "audio.mp3")
+    shutil.copyfile(os.path.join(TESTDATA, "no-metadata.mp3"), audio)
+
+    tags = metadata.ID3SourceFrameOrder()
+    for frame in make_frames(chapters):
+        tags.add(frame)
+    return lambda: tags.save(audio, padding=metadata.PaddingPolicy())
+
+
+def run(name: str, repeat: int, min_time: float) -> t.Dict[str, t.Any]:
+    fn, param = BENCHMARKS[name]
+    timer = timeit.Timer(fn(param))
+
+    # Calibrate the number of loops so that a single repeat takes at least
+    # `min_time` seconds, the same way `python -m timeit` does.
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2 if number < 1000 else 10
+    timings = [timing / number for timing in timer.repeat(repeat, number)]
+
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "loops": number,
+        "repeat": repeat,
+    }
+
+
+def compare(
+    baseline: t.Dict[str, t.Any], current: t.Dict[str, t.Any], threshold: float
+) -> t.List[str]:
+    """Print relative timings of benchmarks, and return names of regressed ones."""
+
+    regressions = []
+
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+
+        ratio = result["min"] / baseline["results"][name]["min"]
+        marker = ""
+        if ratio > 1 + threshold:
+            marker = "  <-- regression"
+            regressions.append(name)
+        print(f"{name:45} {ratio:6.2f}x{marker}")
+
+    return regressions
+
+
+def main(argv: t.Optional[t.List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", help="write results as JSON to a given file")
+    parser.add_argument(
+        "-k", "--filter", default="", help="run benchmarks whose names contain it"
+    )
+    parser.add_argument("--repeat", type=int, default=5, help="repeats per benchmark")
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.2,
+        help="minimum time of a single repeat in seconds",
+    )
+    parser.add_argument("--compare", metavar="BASELINE", help="compare with results")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="slowdown ratio reported as a regression (defaults to 0.2)",
+    )
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in BENCHMARKS:
+        if args.filter not in name:
+            continue
+        results[name] = run(name, args.repeat, args.min_time)
+        print(f"{name:45} {results[name]['min'] * 1e6:12.1f} us", file=sys.stderr)
+
+    current = {
+        "id3manager": importlib.metadata.version("id3manager"),
+        "python": platform.python_implementation() + " " + platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as fp:
+            json.dump(current, fp, indent=2)
+            fp.write("\n")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fp:
+            baseline = json.load(fp)
+        if compare(baseline, current, args.threshold):
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,49 +1,530 @@
 import argparse
+import functools
+import io
+import json
 import os
-import subprocess
+import re
 import sys
-import tempfile
 
-import mutagen.mp3 as mp3
-
-from . import formats, metadata
+# Modules that import mutagen and formatters are imported by subcommands that
+# need them, so that requests forwarded to the daemon don't pay for them.
+from . import client, duration, formats, padding, profiling
 
 EDITOR = os.environ.get("EDITOR", "vi")
 
 
 def get_subcommand_entrypoint(args, file=sys.stdout):
-    audio_mp3 = mp3.MP3(args.audio, ID3=metadata.ID3SourceFrameOrder)
-    if audio_mp3.tags is None:
-        return
-    frames = audio_mp3.tags.values()
+    if args.table is not None:
+        return _write_table(args, file)
+
+    socket_path = _get_daemon_socket(args)
+    if socket_path and len(args.audio) == 1 and not os.path.isdir(args.audio[0]):
+        pictures_dir = args.extract_pictures
+        response = _forward(
+            socket_path,
+            command="get",
+            audio=os.path.abspath(args.audio[0]),
+            format=args.format,
+            pictures_dir=os.path.abspath(pictures_dir) if pictures_dir else None,
+            frames=sorted(args.frames) if args.frames is not None else None,
+        )
+        if response is not None:
+            if "error" in response:
+                print(f"{args.audio[0]}: {response['error']}", file=sys.stderr)
+                return 1
+            file.write(response["output"])
+            return 0
+
+    from . import batch, tagging
+
+    if len(args.audio) == 1 and not os.path.isdir(args.audio[0]):
+        # A single file's metadata is streamed right into the output, without
+        # a header, so that it stays a parseable document.
+        try:
+            tagging.dump_metadata(
+                args.audio[0],
+                args.format,
+                file,
+                pictures_dir=args.extract_pictures,
+                frame_ids=args.frames,
+            )
+        except Exception as exc:
+            print(f"{args.audio[0]}: {exc}", file=sys.stderr)
+            return 1
+        return 0
+
+    # Otherwise, a header is printed before each file's metadata.
+    printed = 0
+    exit_code = 0
 
-    metadata.write_metadata(file, args.format, frames)
+    results = batch.imap(
+        functools.partial(
+            tagging.get_metadata,
+            format=args.format,
+            pictures_dir=args.extract_pictures,
+            frame_ids=args.frames,
+        ),
+        batch.iter_audio_files(args.audio),
+        jobs=args.jobs,
+    )
+
+    for audio, future in results:
+        try:
+            output = future.result()
+        except Exception as exc:
+            print(f"{audio}: {exc}", file=sys.stderr)
+            exit_code = 1
+            continue
+
+        if printed:
+            print(file=file)
+        print(f"==> {audio} <==", file=file)
+        file.write(output)
+        file.flush()
+        printed += 1
+
+    return exit_code
 
 
 def set_subcommand_entrypoint(args, file=sys.stdin):
-    audio_mp3 = mp3.MP3(args.audio, ID3=metadata.ID3SourceFrameOrder)
+    socket_path = _get_daemon_socket(args)
+    if socket_path and args.manifest is None:
+        document = file.read()
+        response = _forward(
+            socket_path,
+            command="set",
+            audio=os.path.abspath(args.audio),
+            format=args.format,
+            document=document,
+            padding=args.padding.spec,
+            duration=args.duration,
+            merge=args.merge,
+        )
+        if response is None:
+            # The daemon is not running after all.
+            file = io.StringIO(document)
+        elif "error" in response:
+            print(f"{args.audio}: {response['error']}", file=sys.stderr)
+            return 1
+        else:
+            print(f"{args.audio}: {'updated' if response['updated'] else 'unchanged'}")
+            return 0
+
+    from . import batch, tagging
+
+    if args.manifest is None:
+        try:
+            updated = tagging.set_metadata(
+                args.audio,
+                file,
+                args.format,
+                padding=args.padding,
+                duration_mode=args.duration,
+                merge=args.merge,
+            )
+        except Exception as exc:
+            print(f"{args.audio}: {exc}", file=sys.stderr)
+            return 1
+
+        print(f"{args.audio}: {'updated' if updated else 'unchanged'}")
+        return 0
+
+    formatter = formats.get_metadata_formatter(args.format)
+    exit_code = 0
+    manifest_errors = []
+
+    def iter_manifest():
+        # A malformed manifest stops the run once documents listed before the
+        # error have been applied and reported, rather than tearing it down.
+        try:
+            yield from batch.iter_manifest(args.manifest, formatter.extension)
+        except (OSError, ValueError) as exc:
+            manifest_errors.append(exc)
+
+    results = batch.imap(
+        functools.partial(
+            tagging.set_metadata_from_document,
+            format=args.format,
+            padding=args.padding,
+            duration_mode=args.duration,
+            merge=args.merge,
+        ),
+        iter_manifest(),
+        jobs=args.jobs,
+    )
+
+    for (audio, _), future in results:
+        try:
+            updated = future.result()
+        except Exception as exc:
+            print(f"{audio}: {exc}", file=sys.stderr)
+            exit_code = 1
+        else:
+            print(f"{audio}: {'updated' if updated else 'unchanged'}", flush=True)
+
+    for exc in manifest_errors:
+        print(exc, file=sys.stderr)
+        exit_code = 1
+
+    return exit_code
+
+
+def pad_subcommand_entrypoint(args):
+    from . import batch, tagging
+
+    exit_code = 0
+
+    results = batch.imap(
+        functools.partial(tagging.pad_tags, padding=args.padding),
+        batch.iter_audio_files(args.audio),
+        jobs=args.jobs,
+    )
+
+    for audio, future in results:
+        try:
+            future.result()
+        except Exception as exc:
+            print(f"{audio}: {exc}", file=sys.stderr)
+            exit_code = 1
+
+    return exit_code
+
+
+def index_subcommand_entrypoint(args):
+    from . import index
+
+    counts = dict.fromkeys(["indexed", "unchanged", "removed", "failed"], 0)
+
+    connection = index.open_index(args.database or index.get_default_database())
+    try:
+        for status, audio, exc in index.update_index(connection, args.audio, args.jobs):
+            counts[status] += 1
+            if exc is not None:
+                print(f"{audio}: {exc}", file=sys.stderr)
+    finally:
+        connection.close()
+
+    print(", ".join(f"{count} {status}" for status, count in counts.items()))
+    return 1 if counts["failed"] else 0
+
+
+def sync_subcommand_entrypoint(args):
+    from . import sync
+
+    counts = dict.fromkeys(["updated", "unchanged", "skipped", "failed"], 0)
+
+    state_path = args.state or sync.get_default_state(args.directory)
+    state = sync.load_state(state_path)
+    try:
+        results = sync.sync_sidecars(
+            state,
+            args.directory,
+            args.format,
+            padding=args.padding,
+            duration_mode=args.duration,
+            jobs=args.jobs,
+        )
+        for status, audio, exc in results:
+            counts[status] += 1
+            if exc is not None:
+                print(f"{audio}: {exc}", file=sys.stderr)
+            elif status != "skipped":
+                print(f"{audio}: {status}", flush=True)
+    finally:
+        sync.save_state(state_path, state)
+
+    print(", ".join(f"{count} {status}" for status, count in counts.items()))
+    return 1 if counts["failed"] else 0
+
+
+def watch_subcommand_entrypoint(args):
+    from . import tagging, watch
+
+    formatter = formats.get_metadata_formatter(args.format)
+    watcher = watch.get_watcher(args.directory, poll=args.poll)
+    print(
+        f"{args.directory}: watching for changes ({watcher.name})",
+        file=sys.stderr,
+        flush=True,
+    )
+
+    try:
+        changes = watch.iter_changes(watcher, formatter.extension, args.debounce)
+        for sidecars in changes:
+            for sidecar in sidecars:
+                audio = watch.find_audio(sidecar)
+                if audio is None or not os.path.isfile(sidecar):
+                    continue
+
+                try:
+                    updated = tagging.set_metadata_from_document(
+                        (audio, sidecar),
+                        args.format,
+                        padding=args.padding,
+                        duration_mode=args.duration,
+                    )
+                except Exception as exc:
+                    print(f"{audio}: {exc}", file=sys.stderr, flush=True)
+                else:
+                    print(
+                        f"{audio}: {'updated' if updated else 'unchanged'}", flush=True
+                    )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+    return 0
+
 
-    frames = metadata.read_metadata(file, args.format, audio_len=audio_mp3.info.length)
+def query_subcommand_entrypoint(args, file=sys.stdout):
+    from . import index, metadata, query
 
-    if audio_mp3.tags is None:
-        audio_mp3.add_tags(ID3=metadata.ID3SourceFrameOrder)
-    audio_mp3.tags.delete(args.audio)
+    connection = index.open_index(args.database or index.get_default_database())
+    try:
+        for idx, (audio, frames) in enumerate(query.run_query(connection, args.query)):
+            if args.paths:
+                print(audio, file=file)
+                continue
 
-    for frame in frames:
-        audio_mp3.tags.add(frame)
-    audio_mp3.save(args.audio)
+            if idx:
+                print(file=file)
+            print(f"==> {audio} <==", file=file)
+            metadata.write_metadata(file, args.format, frames)
+            file.flush()
+    except ValueError as exc:
+        print(f"{args.query}: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        connection.close()
+
+    return 0
 
 
 def edit_subcommand_entrypoint(args):
-    with tempfile.NamedTemporaryFile(mode="w+t") as fp:
-        get_subcommand_entrypoint(args, file=fp)
+    from . import batch, metadata, tagging
+
+    formatter = formats.get_metadata_formatter(args.format)
+
+    if len(args.audio) == 1 and not os.path.isdir(args.audio[0]):
+        audio = args.audio[0]
+
+        # The tags are loaded once, and are reused to set the edited metadata.
+        with profiling.phase("load_tags"):
+            tags = metadata.load_tags(audio)
+
+        document = io.StringIO()
+        if tags is not None:
+            with profiling.phase("write_metadata"):
+                metadata.write_metadata(document, args.format, tags.values())
+
+        edited = _run_editor(document.getvalue(), formatter.extension)
+        if edited != document.getvalue():
+            tagging.set_metadata(audio, io.StringIO(edited), args.format, tags=tags)
+        return 0
+
+    # Otherwise, metadata of all files is edited in a single buffer, in
+    # sections headed the same way as in the output of the get command.
+    documents = {}
+    exit_code = 0
+
+    results = batch.imap(
+        functools.partial(tagging.get_metadata, format=args.format),
+        batch.iter_audio_files(args.audio),
+        jobs=args.jobs,
+    )
+
+    for audio, future in results:
+        try:
+            documents[audio] = future.result()
+        except Exception as exc:
+            print(f"{audio}: {exc}", file=sys.stderr)
+            exit_code = 1
+
+    edited = _run_editor(
+        "\n".join(
+            f"==> {audio} <==\n{document}" for audio, document in documents.items()
+        ),
+        formatter.extension,
+    )
+
+    try:
+        sections = _split_sections(edited)
+    except ValueError as exc:
+        print(f"edit: {exc}", file=sys.stderr)
+        return 1
+
+    # Sections are separated by blank lines, which are not a part of the
+    # documents. Only changed sections are written back.
+    changed = []
+    for audio, document in sections:
+        if audio not in documents:
+            print(f"{audio}: unknown section", file=sys.stderr)
+            exit_code = 1
+        elif document.rstrip("\n") != documents[audio].rstrip("\n"):
+            changed.append((audio, document))
+
+    results = batch.imap(
+        functools.partial(tagging.set_metadata_from_string, format=args.format),
+        changed,
+        jobs=args.jobs,
+    )
+
+    for (audio, _), future in results:
+        try:
+            updated = future.result()
+        except Exception as exc:
+            print(f"{audio}: {exc}", file=sys.stderr)
+            exit_code = 1
+        else:
+            print(f"{audio}: {'updated' if updated else 'unchanged'}", flush=True)
+
+    return exit_code
+
+
+def _run_editor(document, extension):
+    import subprocess
+    import tempfile
+
+    with tempfile.NamedTemporaryFile(
+        mode="w+t", encoding="utf-8", suffix=extension
+    ) as fp:
+        fp.write(document)
         fp.flush()
 
-        process = subprocess.Popen([EDITOR, fp.name])
-        process.wait()
+        with profiling.phase("editor"):
+            process = subprocess.Popen([EDITOR, fp.name])
+            process.wait()
+
+        # Editors may replace the file rather than write into it, hence it's
+        # opened again by its name.
+        with open(fp.name, encoding="utf-8") as edited:
+            return edited.read()
+
+
+def _split_sections(buffer):
+    sections = {}
+    audio = None
+
+    for line in buffer.splitlines(keepends=True):
+        if line.startswith("==> ") and line.rstrip("\r\n").endswith(" <=="):
+            audio = line.rstrip("\r\n")[len("==> ") : -len(" <==")]
+            if audio in sections:
+                raise ValueError(f"{audio}: duplicate section")
+            sections[audio] = []
+        elif audio is not None:
+            sections[audio].append(line)
+        elif line.strip():
+            raise ValueError("metadata outside of a section")
+
+    return [(audio, "".join(lines)) for audio, lines in sections.items()]
+
+
+def serve_subcommand_entrypoint(args):
+    from . import server
+
+    try:
+        server.serve(args.socket, jobs=args.jobs)
+    except KeyboardInterrupt:
+        pass
+    except RuntimeError as exc:
+        print(exc, file=sys.stderr)
+        return 1
+    return 0
+
+
+def _get_daemon_socket(args):
+    # Profiling is about this process, hence requests are not forwarded.
+    if args.profile or args.profile_output:
+        return None
+
+    path = client.get_default_socket()
+    return path if os.path.exists(path) else None
+
+
+def _forward(socket_path, **request):
+    # A socket may be left behind by a daemon that has been killed, in which
+    # case the request is executed in this process.
+    try:
+        return client.send_request(socket_path, request)
+    except OSError:
+        return None
 
-        fp.seek(0)
-        set_subcommand_entrypoint(args, file=fp)
+
+def _jobs(value):
+    try:
+        jobs = int(value)
+    except ValueError:
+        jobs = -1
+    if jobs < 0:
+        raise argparse.ArgumentTypeError(f"{value}: not a non-negative integer")
+    return jobs
+
+
+def _frame_ids(value):
+    # The order is retained, since these are the columns of tables too.
+    frame_ids = tuple(dict.fromkeys(value.split(",")))
+    for frame_id in frame_ids:
+        if not re.fullmatch("[A-Z0-9]{4}", frame_id):
+            raise argparse.ArgumentTypeError(f"{frame_id}: invalid frame ID")
+    return frame_ids
+
+
+def _write_table(args, file):
+    import csv
+
+    from . import batch, table
+
+    frame_ids = args.frames or table.DEFAULT_COLUMNS
+    writer = csv.writer(file, **table.DIALECTS[args.table])
+    writer.writerow(["path", *frame_ids])
+
+    # Rows are written as soon as files are parsed, hence only a bounded
+    # window of rows is in memory regardless of the number of files.
+    exit_code = 0
+    results = batch.imap(
+        functools.partial(table.get_row, frame_ids=frame_ids),
+        batch.iter_audio_files(args.audio),
+        jobs=args.jobs,
+    )
+
+    for audio, future in results:
+        try:
+            row = future.result()
+        except Exception as exc:
+            print(f"{audio}: {exc}", file=sys.stderr)
+            exit_code = 1
+            continue
+
+        writer.writerow(row)
+        file.flush()
+
+    return exit_code
+
+
+def profile_subcommand(args):
+    from . import pictures
+
+    # Phases are only accounted for in this process, hence worker processes
+    # are not used while profiling.
+    if hasattr(args, "jobs"):
+        args.jobs = 1
+
+    profiler = profiling.enable()
+    try:
+        return args.subcommand(args)
+    finally:
+        profiling.disable()
+
+        report = profiler.report()
+        report["artwork_cache"] = pictures.artwork_cache.info()._asdict()
+
+        if args.profile_output:
+            with open(args.profile_output, "w", encoding="utf-8") as fp:
+                json.dump(report, fp, indent=2)
+                fp.write("\n")
+        else:
+            print(profiler.format(), file=sys.stderr)
 
 
 def main(argv=sys.argv[1:]):
@@ -53,9 +534,19 @@ def main(argv=sys.argv[1:]):
     parser.add_argument(
         "-f",
         "--format",
-        choices=formats.get_supported_formats(),
         default="text",
-        help="format to use for metadata",
+        help="format to use for metadata: text (default), toml, jsonl, "
+        "or one provided by an installed plugin",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="report wall time and peak memory of each phase to stderr",
+    )
+    parser.add_argument(
+        "--profile-output",
+        metavar="PATH",
+        help="write the profiling report as JSON to a file instead of stderr",
     )
     subparsers = parser.add_subparsers(required=True, title="subcommands")
 
@@ -63,32 +554,275 @@ def main(argv=sys.argv[1:]):
     parser_get.add_argument(
         "audio",
         metavar="audio.mp3",
-        type=argparse.FileType("rb"),
-        help="the aduio file to get metadata from",
+        nargs="+",
+        help="the audio files (or directories of them) to get metadata from",
+    )
+    parser_get.add_argument(
+        "-j",
+        "--jobs",
+        metavar="N",
+        type=_jobs,
+        default=1,
+        help="number of worker processes to parse files with (0 means one per CPU)",
+    )
+    parser_get.add_argument(
+        "--extract-pictures",
+        metavar="DIR",
+        help="store embedded pictures in a directory, named by their content "
+        "hash, and refer to them by file:// URLs",
+    )
+    parser_get.add_argument(
+        "--frames",
+        metavar="IDS",
+        type=_frame_ids,
+        help="get only frames of comma-separated IDs, e.g. TIT2,TALB,CHAP; "
+        "other frames are skipped without being decoded",
+    )
+    parser_get.add_argument(
+        "--table",
+        choices=["csv", "tsv"],
+        help="write a table row per file instead, with the path and a column per "
+        "frame of --frames (defaults to TIT2,TPE1,TALB,TDRC,TRCK,TCON,CHAP); "
+        "CHAP is the number of chapters; files are always parsed in-process, "
+        "not by the daemon",
     )
     parser_get.set_defaults(subcommand=get_subcommand_entrypoint)
 
-    parser_set = subparsers.add_parser("set", help="set ID3 metadata")
+    # Options of subcommands that set metadata.
+    set_options = argparse.ArgumentParser(add_help=False)
+    set_options.add_argument(
+        "--padding",
+        metavar="POLICY",
+        type=padding.PaddingPolicy,
+        default=padding.PaddingPolicy("keep"),
+        help="padding to reserve when a tag outgrows its space: "
+        "fixed:N (bytes), percent:P (of audio size) or keep (default)",
+    )
+    set_options.add_argument(
+        "--duration",
+        choices=duration.MODES,
+        default="exact",
+        help="how to compute the audio duration, which is the end of the last chapter: "
+        "exact scans all MPEG frames unless the first one has a Xing/VBRI frame "
+        "count, estimate reads the first frame only",
+    )
+
+    parser_set = subparsers.add_parser(
+        "set", parents=[set_options], help="set ID3 metadata"
+    )
     parser_set.add_argument(
         "audio",
         metavar="audio.mp3",
-        type=argparse.FileType("rb+"),
+        nargs="?",
         help="the audio file to set metadata in",
     )
+    parser_set.add_argument(
+        "-m",
+        "--manifest",
+        metavar="PATH",
+        help="a JSON Lines file mapping audio files to metadata documents, "
+        "or a directory of sidecar metadata documents",
+    )
+    parser_set.add_argument(
+        "-j",
+        "--jobs",
+        metavar="N",
+        type=_jobs,
+        default=1,
+        help="number of worker processes to set metadata with (0 means one per CPU)",
+    )
+    parser_set.add_argument(
+        "--merge",
+        action="store_true",
+        help="replace only frames of IDs present in the metadata, and keep the rest; "
+        "chapters are kept unless there are any",
+    )
     parser_set.set_defaults(subcommand=set_subcommand_entrypoint)
 
+    parser_pad = subparsers.add_parser("pad", help="reserve padding for future edits")
+    parser_pad.add_argument(
+        "audio",
+        metavar="audio.mp3",
+        nargs="+",
+        help="the audio files (or directories of them) to pad tags in",
+    )
+    parser_pad.add_argument(
+        "-j",
+        "--jobs",
+        metavar="N",
+        type=_jobs,
+        default=1,
+        help="number of worker processes to pad tags with (0 means one per CPU)",
+    )
+    parser_pad.add_argument(
+        "--padding",
+        metavar="POLICY",
+        type=padding.PaddingPolicy,
+        default=padding.PaddingPolicy("fixed:65536"),
+        help="padding to reserve: fixed:N (bytes, default is 65536), "
+        "percent:P (of audio size) or keep",
+    )
+    parser_pad.set_defaults(subcommand=pad_subcommand_entrypoint)
+
+    parser_index = subparsers.add_parser(
+        "index", help="index ID3 metadata of a library"
+    )
+    parser_index.add_argument(
+        "audio",
+        metavar="audio.mp3",
+        nargs="+",
+        help="the audio files (or directories of them) to index",
+    )
+    parser_index.add_argument(
+        "-d",
+        "--database",
+        metavar="PATH",
+        help="the index database (defaults to ~/.cache/id3manager/index.sqlite3)",
+    )
+    parser_index.add_argument(
+        "-j",
+        "--jobs",
+        metavar="N",
+        type=_jobs,
+        default=1,
+        help="number of worker processes to parse files with (0 means one per CPU)",
+    )
+    parser_index.set_defaults(subcommand=index_subcommand_entrypoint)
+
+    parser_query = subparsers.add_parser("query", help="query indexed ID3 metadata")
+    parser_query.add_argument(
+        "query",
+        help="a filter such as 'TCON=Podcast AND NOT TLAN' or 'CHAP>10 OR APIC>1000000'",
+    )
+    parser_query.add_argument(
+        "-d",
+        "--database",
+        metavar="PATH",
+        help="the index database (defaults to ~/.cache/id3manager/index.sqlite3)",
+    )
+    parser_query.add_argument(
+        "-l",
+        "--paths",
+        action="store_true",
+        help="print paths of matching files only",
+    )
+    parser_query.set_defaults(subcommand=query_subcommand_entrypoint)
+
+    parser_sync = subparsers.add_parser(
+        "sync",
+        parents=[set_options],
+        help="set ID3 metadata from changed sidecar metadata documents",
+    )
+    parser_sync.add_argument(
+        "directory",
+        help="the directory of audio files and sidecar metadata documents",
+    )
+    parser_sync.add_argument(
+        "--state",
+        metavar="PATH",
+        help="the file to track applied documents in "
+        "(defaults to one per directory in ~/.cache/id3manager/sync/)",
+    )
+    parser_sync.add_argument(
+        "-j",
+        "--jobs",
+        metavar="N",
+        type=_jobs,
+        default=0,
+        help="number of worker processes to set metadata with "
+        "(0 means one per CPU, default)",
+    )
+    parser_sync.set_defaults(subcommand=sync_subcommand_entrypoint)
+
+    parser_watch = subparsers.add_parser(
+        "watch",
+        parents=[set_options],
+        help="set ID3 metadata from sidecar metadata documents as they change",
+    )
+    parser_watch.add_argument(
+        "directory",
+        help="the directory of audio files and sidecar metadata documents",
+    )
+    parser_watch.add_argument(
+        "--poll",
+        action="store_true",
+        help="scan the directory periodically instead of using inotify, "
+        "e.g. on network file systems",
+    )
+    parser_watch.add_argument(
+        "--debounce",
+        metavar="SECONDS",
+        type=float,
+        default=0.5,
+        help="how long a document must stay unchanged before it's applied "
+        "(defaults to 0.5)",
+    )
+    parser_watch.set_defaults(subcommand=watch_subcommand_entrypoint)
+
+    parser_serve = subparsers.add_parser(
+        "serve", help="serve get and set requests of other invocations"
+    )
+    parser_serve.add_argument(
+        "--socket",
+        metavar="PATH",
+        default=client.get_default_socket(),
+        help="the UNIX socket to listen on (defaults to $ID3MANAGER_SOCKET, "
+        "or id3manager.sock in $XDG_RUNTIME_DIR)",
+    )
+    parser_serve.add_argument(
+        "-j",
+        "--jobs",
+        metavar="N",
+        type=_jobs,
+        default=0,
+        help="number of requests to handle concurrently (0 means one per CPU, default)",
+    )
+    parser_serve.set_defaults(subcommand=serve_subcommand_entrypoint)
+
     parser_edit = subparsers.add_parser("edit", help="interactively edit ID3 metadata")
     parser_edit.add_argument(
         "audio",
         metavar="audio.mp3",
-        type=argparse.FileType("rb+"),
-        help="the audio file to edit metadata in",
+        nargs="+",
+        help="the audio files (or directories of them) to edit metadata in, "
+        "in a single editor buffer",
+    )
+    parser_edit.add_argument(
+        "-j",
+        "--jobs",
+        metavar="N",
+        type=_jobs,
+        default=1,
+        help="number of worker processes to parse files with (0 means one per CPU)",
     )
     parser_edit.set_defaults(subcommand=edit_subcommand_entrypoint)
 
     args = parser.parse_args(argv)
+    if not formats.is_supported_format(args.format):
+        parser.error(f"argument -f/--format: {args.format}: unsupported format")
+
+    if args.subcommand is get_subcommand_entrypoint and args.table is not None:
+        if args.extract_pictures is not None:
+            parser_get.error("argument --table: not allowed with --extract-pictures")
+        if args.format != parser.get_default("format"):
+            parser_get.error("argument --table: not allowed with -f/--format")
+
+    if args.subcommand is set_subcommand_entrypoint:
+        if (args.audio is None) == (args.manifest is None):
+            parser_set.error("exactly one of audio.mp3 or --manifest is required")
+
+    if args.subcommand is sync_subcommand_entrypoint:
+        if not os.path.isdir(args.directory):
+            parser_sync.error(f"{args.directory}: not a directory")
+
+    if args.subcommand is watch_subcommand_entrypoint:
+        if not os.path.isdir(args.directory):
+            parser_watch.error(f"{args.directory}: not a directory")
+
+    if args.profile or args.profile_output:
+        return profile_subcommand(args)
     return args.subcommand(args)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
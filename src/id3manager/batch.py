@@ -0,0 +1,155 @@
+import collections
+import json
+import os
+import typing as t
+
+if t.TYPE_CHECKING:
+    import concurrent.futures
+
+__all__ = [
+    "Skip",
+    "iter_audio_files",
+    "iter_manifest",
+    "iter_sidecars",
+    "imap",
+    "imap_skipping",
+]
+
+AUDIO_EXTENSIONS = {".mp3"}
+
+
+class Skip(t.NamedTuple):
+    """An item to pass through `imap_skipping` as is, instead of processing it."""
+
+    value: t.Any
+
+
+def iter_audio_files(paths: t.Iterable[str]) -> t.Iterator[str]:
+    """Yield audio files, recursively walking directories in a stable order."""
+
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() in AUDIO_EXTENSIONS:
+                    yield os.path.join(root, name)
+
+
+def iter_sidecars(directory: str, extension: str) -> t.Iterator[t.Tuple[str, str]]:
+    """Yield pairs of audio files and metadata documents stored next to them.
+
+    A sidecar document shares the name of the audio file, except for the
+    extension, e.g. "episode.mp3" and "episode.txt". Audio files without a
+    sidecar are skipped.
+    """
+
+    for audio in iter_audio_files([directory]):
+        sidecar = os.path.splitext(audio)[0] + extension
+        if os.path.isfile(sidecar):
+            yield audio, sidecar
+
+
+def iter_manifest(path: str, extension: str) -> t.Iterator[t.Tuple[str, str]]:
+    """Yield pairs of audio files and metadata documents from a manifest.
+
+    The manifest is either a directory of sidecar documents or a JSON Lines
+    file where each line maps an audio file to its metadata document, e.g.
+    {"audio": "episode.mp3", "metadata": "episode.txt"}. Relative paths are
+    resolved against the manifest location.
+    """
+
+    if os.path.isdir(path):
+        yield from iter_sidecars(path, extension)
+        return
+
+    basedir = os.path.dirname(path)
+    with open(path, encoding="utf-8") as fp:
+        for lineno, line in enumerate(fp, start=1):
+            if not line.strip():
+                continue
+
+            try:
+                entry = json.loads(line)
+                audio, document = entry["audio"], entry["metadata"]
+            except (ValueError, TypeError, KeyError):
+                raise ValueError(f"{path}:{lineno}: invalid manifest entry")
+
+            yield os.path.join(basedir, audio), os.path.join(basedir, document)
+
+
+def imap(
+    fn: t.Callable[..., t.Any],
+    items: t.Iterable[t.Any],
+    jobs: int = 1,
+) -> t.Iterator[t.Tuple[t.Any, "concurrent.futures.Future"]]:
+    """Apply a function to every item, yielding futures in the input order.
+
+    With more than one job, the function is executed in a pool of worker
+    processes: mutagen is pure Python, so threads would be serialized by the
+    GIL. Only a bounded window of items is submitted ahead of the consumer,
+    so results stream out as soon as the head of the queue is ready and
+    arbitrary long inputs are processed in a constant memory.
+    """
+
+    # Imported lazily, as it's relatively slow to import and most runs of
+    # the CLI process a single file.
+    import concurrent.futures
+
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+
+    if jobs == 1:
+        for item in items:
+            future = concurrent.futures.Future()
+            try:
+                future.set_result(fn(item))
+            except Exception as exc:
+                future.set_exception(exc)
+            yield item, future
+        return
+
+    window = collections.deque()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as executor:
+        for item in items:
+            window.append((item, executor.submit(fn, item)))
+            if len(window) >= jobs * 2:
+                yield window.popleft()
+
+        while window:
+            yield window.popleft()
+
+
+def imap_skipping(
+    fn: t.Callable[..., t.Any],
+    items: t.Iterable[t.Any],
+    jobs: int = 1,
+) -> t.Iterator[t.Tuple[t.Any, t.Optional["concurrent.futures.Future"]]]:
+    """Like `imap`, but pass values of `Skip` items through with no future.
+
+    Skipped values are yielded as soon as the items that came before them
+    are, so they interleave with results in about the input order, while the
+    rest are processed in the background.
+    """
+
+    skipped = collections.deque()
+
+    def iter_processed():
+        for item in items:
+            if isinstance(item, Skip):
+                skipped.append(item.value)
+            else:
+                yield item
+
+    for item, future in imap(fn, iter_processed(), jobs):
+        yield from _drain(skipped)
+        yield item, future
+    yield from _drain(skipped)
+
+
+def _drain(queue: t.Deque) -> t.Iterator[t.Tuple[t.Any, None]]:
+    while queue:
+        yield queue.popleft(), None
@@ -0,0 +1,58 @@
+import json
+import os
+import socket
+import typing as t
+
+__all__ = [
+    "get_default_socket",
+    "is_listening",
+    "send_request",
+]
+
+# This module is imported by the CLI before anything else is, so that
+# requests could be forwarded to the daemon. Hence it must not import
+# mutagen, formatters and the like, which are what the daemon saves on.
+
+
+def get_default_socket() -> str:
+    """Return the path to the socket of the daemon."""
+
+    path = os.environ.get("ID3MANAGER_SOCKET")
+    if path:
+        return path
+
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir:
+        return os.path.join(runtime_dir, "id3manager.sock")
+    return os.path.join(
+        os.environ.get("TMPDIR", "/tmp"), f"id3manager-{os.getuid()}.sock"
+    )
+
+
+def is_listening(path: str) -> bool:
+    """Return whether a daemon is listening on a given socket."""
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            return False
+    return True
+
+
+def send_request(path: str, request: t.Dict[str, t.Any]) -> t.Dict[str, t.Any]:
+    """Send a request to the daemon listening on a given socket.
+
+    Raise `OSError` if there's no daemon listening.
+    """
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        with sock.makefile("rwb") as fileobj:
+            fileobj.write(json.dumps(request, ensure_ascii=False).encode() + b"\n")
+            fileobj.flush()
+            response = fileobj.readline()
+
+    if not response:
+        raise ConnectionResetError(f"{path}: daemon has closed the connection")
+    return json.loads(response)
@@ -0,0 +1,254 @@
+import contextlib
+import mmap
+import os
+import typing as t
+
+if t.TYPE_CHECKING:
+    import sqlite3
+
+__all__ = [
+    "get_duration",
+    "remember_duration",
+    "scan_duration",
+    "MODES",
+]
+
+MODES = ["exact", "estimate"]
+
+# Bitrates in kbps, indexed by (MPEG version is 1, layer) and a bitrate index.
+_BITRATES = {
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+
+# Sample rates in Hz, indexed by the version bits and a sample rate index.
+_SAMPLE_RATES = {
+    0: [11025, 12000, 8000],  # MPEG 2.5
+    2: [22050, 24000, 16000],  # MPEG 2
+    3: [44100, 48000, 32000],  # MPEG 1
+}
+
+
+class _FrameHeader(t.NamedTuple):
+    version: int
+    layer: int
+    mono: bool
+    sample_rate: int
+    bitrate: int
+    samples: int
+    length: int
+
+
+def _parse_frame_header(data: bytes) -> t.Optional[_FrameHeader]:
+    """Parse a 4-byte MPEG audio frame header, return None if it's not one."""
+
+    b0, b1, b2, b3 = data
+    if b0 != 0xFF or b1 & 0xE0 != 0xE0:
+        return None
+
+    version = (b1 >> 3) & 0x03
+    layer = 4 - ((b1 >> 1) & 0x03)
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 0x03
+    if version == 1 or layer == 4 or sample_rate_index == 3:
+        return None
+    if bitrate_index == 0 or bitrate_index == 15:
+        # Free format bitrates are not supported (and are hardly ever used).
+        return None
+
+    is_v1 = version == 3
+    bitrate = _BITRATES[is_v1, layer][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    padding = (b2 >> 1) & 0x01
+
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples = 1152 if is_v1 or layer == 2 else 576
+        length = samples // 8 * bitrate // sample_rate + padding
+
+    return _FrameHeader(
+        version, layer, b3 >> 6 == 3, sample_rate, bitrate, samples, length
+    )
+
+
+def _find_audio_start(mm: mmap.mmap) -> int:
+    """Return the offset right after ID3v2 tags at the start of a file."""
+
+    offset = 0
+    while mm[offset : offset + 3] == b"ID3" and len(mm) >= offset + 10:
+        size = 0
+        for byte in mm[offset + 6 : offset + 10]:
+            size = (size << 7) | (byte & 0x7F)
+        footer = 10 if mm[offset + 5] & 0x10 else 0
+        offset += 10 + size + footer
+    return offset
+
+
+def _find_first_frame(
+    mm: mmap.mmap, offset: int, end: int
+) -> t.Tuple[int, _FrameHeader]:
+    """Return the first frame that is followed by a frame of the same stream."""
+
+    while True:
+        offset = mm.find(b"\xff", offset, end - 3)
+        if offset < 0:
+            raise ValueError("can't find MPEG audio frames")
+
+        header = _parse_frame_header(mm[offset : offset + 4])
+        if header is not None:
+            following = offset + header.length
+            if following + 4 > end:
+                return offset, header
+
+            next_header = _parse_frame_header(mm[following : following + 4])
+            if next_header is not None and _same_stream(header, next_header):
+                return offset, header
+
+        offset += 1
+
+
+def _same_stream(a: _FrameHeader, b: _FrameHeader) -> bool:
+    return (a.version, a.layer, a.sample_rate) == (b.version, b.layer, b.sample_rate)
+
+
+def _read_vbr_frames(
+    mm: mmap.mmap, offset: int, header: _FrameHeader
+) -> t.Optional[int]:
+    """Return the number of audio frames from a Xing/Info or VBRI header."""
+
+    if header.version == 3:
+        xing_offset = offset + 4 + (17 if header.mono else 32)
+    else:
+        xing_offset = offset + 4 + (9 if header.mono else 17)
+
+    if mm[xing_offset : xing_offset + 4] in {b"Xing", b"Info"}:
+        flags = int.from_bytes(mm[xing_offset + 4 : xing_offset + 8], "big")
+        if flags & 0x01:
+            return int.from_bytes(mm[xing_offset + 8 : xing_offset + 12], "big")
+        return None
+
+    vbri_offset = offset + 4 + 32
+    if mm[vbri_offset : vbri_offset + 4] == b"VBRI":
+        return int.from_bytes(mm[vbri_offset + 14 : vbri_offset + 18], "big")
+
+    return None
+
+
+def scan_duration(path: str, mode: str = "exact") -> float:
+    """Compute the duration of an MPEG audio file in seconds.
+
+    Both modes rely on the frame count of a Xing/Info or VBRI header in the
+    first frame, if any, which is as precise as it gets and needs no more
+    than the first frame to be read. Otherwise, the "exact" mode walks every
+    MPEG frame header and sums up their samples, which is precise for any
+    file, including VBR ones, while the "estimate" mode assumes a constant
+    bitrate.
+    """
+
+    if mode not in MODES:
+        raise ValueError(f"{mode}: unsupported duration mode")
+
+    with open(path, "rb") as fp, contextlib.ExitStack() as stack:
+        if os.fstat(fp.fileno()).st_size == 0:
+            raise ValueError("can't find MPEG audio frames")
+        mm = stack.enter_context(mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ))
+
+        end = len(mm)
+        if end >= 128 and mm[end - 128 : end - 125] == b"TAG":
+            end -= 128
+
+        offset, header = _find_first_frame(mm, _find_audio_start(mm), end)
+
+        vbr_frames = _read_vbr_frames(mm, offset, header)
+        if vbr_frames is not None:
+            return vbr_frames * header.samples / header.sample_rate
+        if mode == "estimate":
+            return (end - offset) * 8 / header.bitrate
+
+        first = header
+        samples = 0
+        while offset + 4 <= end:
+            header = _parse_frame_header(mm[offset : offset + 4])
+            if header is None or not _same_stream(first, header):
+                # Junk in between of frames, resynchronize.
+                offset = mm.find(b"\xff", offset + 1, end)
+                if offset < 0:
+                    break
+                continue
+
+            samples += header.samples
+            offset += header.length
+
+        return samples / first.sample_rate
+
+
+def get_duration(path: str, mode: str = "exact") -> float:
+    """Return the duration of an MPEG audio file in seconds.
+
+    Durations are cached persistently by the file's device, inode, size and
+    mtime, so that the audio stream is scanned only once per file.
+    """
+
+    st = os.stat(path)
+
+    with _open_cache() as cache:
+        row = cache.execute(
+            "SELECT duration FROM durations"
+            " WHERE device = ? AND inode = ? AND mode = ? AND size = ? AND mtime = ?",
+            (st.st_dev, st.st_ino, mode, st.st_size, st.st_mtime_ns),
+        ).fetchone()
+    if row is not None:
+        return row[0]
+
+    duration = scan_duration(path, mode)
+    remember_duration(path, duration, mode)
+    return duration
+
+
+def remember_duration(path: str, duration: float, mode: str = "exact") -> None:
+    """Store the duration of an MPEG audio file in the persistent cache.
+
+    This is meant to be called after tags are saved, since saving changes the
+    file's mtime (and possibly size) but retains its audio stream.
+    """
+
+    st = os.stat(path)
+
+    with _open_cache() as cache:
+        cache.execute(
+            "INSERT OR REPLACE INTO durations VALUES (?, ?, ?, ?, ?, ?)",
+            (st.st_dev, st.st_ino, mode, st.st_size, st.st_mtime_ns, duration),
+        )
+
+
+@contextlib.contextmanager
+def _open_cache() -> t.Iterator["sqlite3.Connection"]:
+    # Imported lazily, so that the CLI could import this module for its
+    # modes without paying for them.
+    import sqlite3
+
+    from . import utils
+
+    cache_dir = utils.get_cache_dir()
+    os.makedirs(cache_dir, exist_ok=True)
+
+    connection = sqlite3.connect(
+        os.path.join(cache_dir, "durations.sqlite3"), timeout=30
+    )
+    try:
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS durations ("
+                " device INTEGER, inode INTEGER, mode TEXT,"
+                " size INTEGER, mtime INTEGER, duration REAL,"
+                " PRIMARY KEY (device, inode, mode))"
+            )
+            yield connection
+    finally:
+        connection.close()
@@ -1,6 +1,7 @@
-from .formats import get_metadata_formatter, get_supported_formats
+from .formats import get_metadata_formatter, get_supported_formats, is_supported_format
 
 __all__ = [
     "get_metadata_formatter",
     "get_supported_formats",
+    "is_supported_format",
 ]
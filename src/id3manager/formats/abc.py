@@ -1,7 +1,8 @@
 import abc
 import typing as t
 
-import mutagen.id3 as id3
+if t.TYPE_CHECKING:
+    import mutagen.id3 as id3
 
 
 class MetadataFormatter(abc.ABC):
@@ -10,10 +11,44 @@ class MetadataFormatter(abc.ABC):
     def name(self) -> str:
         """Return a string name of this metadata formatter."""
 
+    @property
+    def extension(self) -> str:
+        """Return a file extension of documents in this metadata format."""
+
+        return f".{self.name}"
+
+    @property
+    def complete_chapters(self) -> bool:
+        """Return whether chapters are read as complete CHAP and CTOC frames.
+
+        Otherwise, chapters are read as start times and titles only, while
+        their element IDs, end times and the table of contents are generated.
+        """
+
+        return False
+
     @abc.abstractmethod
-    def read(self, fileobj: t.IO) -> t.List[id3.Frame]:
+    def read(self, fileobj: t.IO) -> t.List["id3.Frame"]:
         """Deserialize ID3 frames from a stream of bytes."""
 
     @abc.abstractmethod
-    def write(self, fileobj: t.IO, frames: t.List[id3.Frame]) -> None:
+    def write(self, fileobj: t.IO, frames: t.List["id3.Frame"]) -> None:
         """Serialize ID3 frames into a stream of bytes."""
+
+    def iter_read(self, fileobj: t.IO) -> t.Iterator["id3.Frame"]:
+        """Deserialize ID3 frames from a stream of bytes one by one.
+
+        Formatters that can parse their documents incrementally should
+        override this to keep memory usage bounded on large documents.
+        """
+
+        yield from self.read(fileobj)
+
+    def iter_write(self, fileobj: t.IO, frames: t.Iterable["id3.Frame"]) -> None:
+        """Serialize ID3 frames into a stream of bytes as they come.
+
+        Formatters that can emit their documents incrementally should
+        override this to keep memory usage bounded on large documents.
+        """
+
+        self.write(fileobj, list(frames))
@@ -1,25 +1,68 @@
+import functools
+import importlib
 import typing as t
 
 from .abc import MetadataFormatter
-from .text import TextMetadataFormatter
-from .toml import TomlMetadataFormatter
 
+# Formatters are referred to by "module:class" strings, so that a formatter
+# module, with its dependencies, is imported only when its format is used.
 FORMATTERS = {
-    formatter.name: formatter
-    for formatter in [TextMetadataFormatter(), TomlMetadataFormatter()]
+    "text": "id3manager.formats.text:TextMetadataFormatter",
+    "toml": "id3manager.formats.toml:TomlMetadataFormatter",
+    "jsonl": "id3manager.formats.jsonl:JsonLinesMetadataFormatter",
 }
 
+# Third-party formatters are registered as entry points of this group, named
+# after their formats, e.g.:
+#
+#   [project.entry-points."id3manager.formatters"]
+#   yaml = "id3manager_yaml:YamlMetadataFormatter"
+ENTRY_POINT_GROUP = "id3manager.formatters"
 
+
+@functools.lru_cache(maxsize=None)
 def get_metadata_formatter(name: str) -> MetadataFormatter:
     """Return an implementation of a given metadata format."""
 
-    try:
-        return FORMATTERS[name]
-    except KeyError:
-        raise ValueError(f"{name}: unsupported format")
+    if name in FORMATTERS:
+        module_name, _, class_name = FORMATTERS[name].partition(":")
+        formatter_cls = getattr(importlib.import_module(module_name), class_name)
+        return formatter_cls()
+
+    # Installed distributions are looked up for entry points only if the
+    # format is not a built-in one, since it's relatively slow.
+    for entry_point in _iter_entry_points():
+        if entry_point.name == name:
+            return entry_point.load()()
+
+    raise ValueError(f"{name}: unsupported format")
+
+
+def is_supported_format(name: str) -> bool:
+    """Return whether a given metadata format is supported.
+
+    Unlike `get_metadata_formatter`, the formatter is not imported.
+    """
+
+    return name in FORMATTERS or any(
+        entry_point.name == name for entry_point in _iter_entry_points()
+    )
 
 
 def get_supported_formats() -> t.List[str]:
     """Return the list of supported metadata formats."""
 
-    return list(FORMATTERS.keys())
+    plugins = [entry_point.name for entry_point in _iter_entry_points()]
+    return list(FORMATTERS.keys()) + [
+        name for name in plugins if name not in FORMATTERS
+    ]
+
+
+def _iter_entry_points() -> t.Iterable[t.Any]:
+    import importlib.metadata
+
+    entry_points = importlib.metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        return entry_points.select(group=ENTRY_POINT_GROUP)
+    # Python 3.9 returns a dictionary of entry points by their groups.
+    return entry_points.get(ENTRY_POINT_GROUP, [])
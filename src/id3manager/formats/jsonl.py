@@ -0,0 +1,178 @@
+import base64
+import json
+import typing as t
+import urllib.parse as urlparse
+
+import mutagen.id3 as id3
+
+from .. import profiling, utils
+from .abc import MetadataFormatter
+
+
+class JsonLinesMetadataFormatter(MetadataFormatter):
+    """One JSON object per line per frame, lossless and cheap to parse.
+
+    Unlike the text and TOML formats, which are meant to be edited by hand,
+    this one is meant for pipelines: frames are encoded and decoded with the
+    standard library only, and every value is kept as is, including multiple
+    text values, descriptions, text encodings and chapter end times.
+    """
+
+    @property
+    def name(self):
+        return "jsonl"
+
+    @property
+    def complete_chapters(self):
+        return True
+
+    def read(self, fileobj: t.IO) -> t.List[id3.Frame]:
+        return list(self.iter_read(fileobj))
+
+    def write(self, fileobj: t.IO, frames: t.List[id3.Frame]) -> None:
+        self.iter_write(fileobj, frames)
+
+    def iter_read(self, fileobj: t.IO) -> t.Iterator[id3.Frame]:
+        for line in fileobj:
+            if not line.strip():
+                continue
+            yield parse_frame(json.loads(line))
+
+    def iter_write(self, fileobj: t.IO, frames: t.Iterable[id3.Frame]) -> None:
+        for frame in frames:
+            if isinstance(frame, id3.APIC) and frame.mime != "-->":
+                # Pictures are written right into the stream, rather than
+                # being encoded into a string first. Data goes last, as it
+                # does in the JSON representation.
+                fileobj.write(
+                    _dumps(unparse_frame(frame, with_picture_data=False))[:-1]
+                )
+                fileobj.write(',"data":"')
+                with profiling.phase("apic_encode"):
+                    utils.write_base64(fileobj, frame.data)
+                fileobj.write('"}\n')
+            else:
+                fileobj.write(_dumps(unparse_frame(frame)))
+                fileobj.write("\n")
+
+
+def parse_frame(frame: t.Dict[str, t.Any]) -> id3.Frame:
+    """Build an ID3 frame from its JSON representation."""
+
+    try:
+        frame_cls = id3.Frames[frame["id"]]
+    except (KeyError, TypeError):
+        raise ValueError(f"{frame}: unsupported frame")
+
+    if issubclass(frame_cls, id3.TextFrame):
+        return frame_cls(
+            text=frame["text"], **_optional(frame, "desc", "lang", "encoding")
+        )
+    elif issubclass(frame_cls, id3.UrlFrame):
+        return frame_cls(url=frame["url"], **_optional(frame, "desc", "encoding"))
+    elif issubclass(frame_cls, id3.APIC):
+        picture_type = id3.PictureType(frame.get("type", id3.PictureType.COVER_FRONT))
+        if "url" in frame:
+            # Pictures referred to by URLs, e.g. extracted ones, are resolved
+            # the same way the text and TOML formats resolve them.
+            picture = utils.create_apic_frame(
+                url=urlparse.urlparse(frame["url"]),
+                mime_type=frame.get("mime"),
+                picture_type=picture_type,
+            )
+            mime, data = picture.mime, picture.data
+        else:
+            with profiling.phase("apic_decode"):
+                mime, data = frame.get("mime", ""), utils.decode_base64(frame["data"])
+        return frame_cls(
+            mime=mime,
+            type=picture_type,
+            desc=frame.get("desc", ""),
+            data=data,
+            **_optional(frame, "encoding"),
+        )
+    elif issubclass(frame_cls, id3.CHAP):
+        return frame_cls(
+            element_id=frame["element_id"],
+            start_time=frame["start_time"],
+            end_time=frame["end_time"],
+            sub_frames=[parse_frame(sub_frame) for sub_frame in frame["sub_frames"]],
+        )
+    elif issubclass(frame_cls, id3.CTOC):
+        return frame_cls(
+            element_id=frame["element_id"],
+            flags=id3.CTOCFlags(frame["flags"]),
+            child_element_ids=frame["child_element_ids"],
+            sub_frames=[parse_frame(sub_frame) for sub_frame in frame["sub_frames"]],
+        )
+    else:
+        raise ValueError(f"{frame}: unsupported frame")
+
+
+def unparse_frame(
+    frame: id3.Frame, with_picture_data: bool = True
+) -> t.Dict[str, t.Any]:
+    """Return the JSON representation of an ID3 frame.
+
+    The data of a picture could be left out, to be written separately.
+    """
+
+    if isinstance(frame, id3.TextFrame):
+        data = {"text": [str(text) for text in frame.text]}
+        data.update(_optional(vars(frame), "desc", "lang"))
+        data.update(_encoding(frame))
+    elif isinstance(frame, id3.UrlFrame):
+        data = {"url": frame.url}
+        data.update(_optional(vars(frame), "desc"))
+        data.update(_encoding(frame))
+    elif isinstance(frame, id3.APIC) and frame.mime == "-->":
+        # A picture referred to by its URL, rather than embedded.
+        data = {
+            "type": int(frame.type),
+            "desc": frame.desc,
+            **_encoding(frame),
+            "url": frame.data.decode(),
+        }
+    elif isinstance(frame, id3.APIC):
+        data = {
+            "mime": frame.mime,
+            "type": int(frame.type),
+            "desc": frame.desc,
+            **_encoding(frame),
+        }
+        if with_picture_data:
+            with profiling.phase("apic_encode"):
+                data["data"] = base64.b64encode(frame.data).decode()
+    elif isinstance(frame, id3.CHAP):
+        data = {
+            "element_id": frame.element_id,
+            "start_time": frame.start_time,
+            "end_time": frame.end_time,
+            "sub_frames": [unparse_frame(sub) for sub in frame.sub_frames.values()],
+        }
+    elif isinstance(frame, id3.CTOC):
+        data = {
+            "element_id": frame.element_id,
+            "flags": int(frame.flags),
+            "child_element_ids": list(frame.child_element_ids),
+            "sub_frames": [unparse_frame(sub) for sub in frame.sub_frames.values()],
+        }
+    else:
+        raise ValueError(f"{frame.FrameID}: unsupported frame")
+
+    return {"id": frame.FrameID, **data}
+
+
+def _dumps(data: t.Dict[str, t.Any]) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def _encoding(frame: id3.Frame) -> t.Dict[str, int]:
+    # Frames are created in UTF-16 by default, hence only other encodings are
+    # written, so that rewriting an unchanged document doesn't re-encode them.
+    encoding = getattr(frame, "encoding", id3.Encoding.UTF16)
+    return {} if encoding == id3.Encoding.UTF16 else {"encoding": int(encoding)}
+
+
+def _optional(frame: t.Dict[str, t.Any], *names: str) -> t.Dict[str, t.Any]:
+    return {name: frame[name] for name in names if name in frame}
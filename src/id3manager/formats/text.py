@@ -1,41 +1,73 @@
-import base64
-import re
+import io
 import typing as t
 import urllib.parse as urlparse
 
 import mutagen.id3 as id3
 
-from .. import utils
+from .. import profiling, utils
 from .abc import MetadataFormatter
 
+# Lines of frames are read in chunks of this many characters.
+_CHUNK_SIZE = 64 * 1024
+
 
 class TextMetadataFormatter(MetadataFormatter):
     @property
     def name(self):
         return "text"
 
-    def read(self, fileobj: t.IO) -> t.List[id3.Frame]:
-        metadata_txt = fileobj.read()
-        frames_txt, chapters_txt = re.split(r"\n{2,}", metadata_txt, maxsplit=1)
+    @property
+    def extension(self):
+        return ".txt"
 
-        frames = []
-        frames.extend(parse_text_frames(frames_txt))
-        frames.extend(parse_text_chapters(chapters_txt))
-        return frames
+    def read(self, fileobj: t.IO) -> t.List[id3.Frame]:
+        return list(self.iter_read(fileobj))
 
     def write(self, fileobj: t.IO, frames: t.List[id3.Frame]) -> None:
-        frames_wo_chapters = [
-            frame for frame in frames if frame.FrameID not in {"CHAP", "CTOC"}
-        ]
-        chapters = [frame for frame in frames if frame.FrameID in {"CHAP"}]
-
-        for frame in frames_wo_chapters:
-            if isinstance(frame, id3.TextFrame):
+        self.iter_write(fileobj, frames)
+
+    def iter_read(self, fileobj: t.IO) -> t.Iterator[id3.Frame]:
+        # Frames come first, then chapters after an empty line. Lines of
+        # frames are read in bounded chunks, so that a picture embedded as a
+        # data URL is decoded as it's read instead of being held as a whole.
+        while True:
+            line = fileobj.readline(_CHUNK_SIZE)
+            if not line.strip():
+                break
+            elif line.endswith("\n") or len(line) < _CHUNK_SIZE:
+                yield parse_text_frame(line)
+            else:
+                yield _parse_long_text_frame(line, fileobj)
+
+        for line in fileobj:
+            if not line.strip():
+                continue
+            yield parse_text_chapter(line)
+
+    def iter_write(self, fileobj: t.IO, frames: t.Iterable[id3.Frame]) -> None:
+        # Chapters go after all other frames, hence their lines are buffered.
+        # They are tiny though, unlike frames such as APIC that are written
+        # out right away.
+        chapters = []
+
+        for frame in frames:
+            if isinstance(frame, id3.CHAP):
+                text = frame.sub_frames["TIT2"].text[0]
+                chapters.append(f"{utils.ms_to_human_time(frame.start_time)} {text}\n")
+                continue
+            elif isinstance(frame, id3.CTOC):
+                continue
+            elif isinstance(frame, id3.TextFrame):
                 value = frame.text[0]
             elif isinstance(frame, id3.UrlFrame):
                 value = frame.url
             elif isinstance(frame, id3.APIC):
-                value = unparse_apic(frame)
+                # Pictures are written right into the stream, rather than
+                # being encoded into a string first.
+                fileobj.write(f"{frame.FrameID} = ")
+                write_apic(fileobj, frame)
+                fileobj.write("\n")
+                continue
             else:
                 raise ValueError(f"{frame.FrameID}: unsupported frame")
             print(frame.FrameID, "=", value, file=fileobj)
@@ -43,45 +75,76 @@ class TextMetadataFormatter(MetadataFormatter):
         if not chapters:
             return
         print(file=fileobj)
+        fileobj.writelines(chapters)
 
-        for chapter in chapters:
-            text = chapter.sub_frames["TIT2"].text[0]
-            print(utils.ms_to_human_time(chapter.start_time), text, file=fileobj)
 
+def parse_text_frame(line: str) -> id3.Frame:
+    """Parse textual representation of a metadata frame."""
 
-def parse_text_frames(frames_txt: str) -> t.List[id3.Frame]:
-    """Parse textual representation of metadata frames."""
+    name, value = line.split("=", maxsplit=1)
+    name, value = name.strip(), value.strip()
+
+    frame_cls = id3.Frames[name]
+    if issubclass(frame_cls, id3.TextFrame):
+        return frame_cls(text=[value])
+    elif issubclass(frame_cls, id3.UrlFrame):
+        return frame_cls(url=value)
+    elif issubclass(frame_cls, id3.APIC):
+        return parse_apic(value)
+    else:
+        raise ValueError(f"{name}: unsupported frame")
+
+
+def _parse_long_text_frame(head: str, fileobj: t.IO) -> id3.Frame:
+    # A line that doesn't fit into a chunk. If it's a picture embedded as a
+    # data URL, it's decoded chunk by chunk. Otherwise, the rest of the line
+    # is read, and it's parsed as usual.
+    name, _, value = head.partition("=")
+    value = value.lstrip()
+    if name.strip() != "APIC" or not value.startswith("data:") or "," not in value:
+        return parse_text_frame(head + fileobj.readline())
+
+    metadata, _, chunk = value[len("data:") :].partition(",")
+    mime_type = _parse_data_url_metadata(metadata)
+
+    # The picture type, if any, follows the data after a space.
+    decoder = utils.Base64Decoder()
+    suffix = None
+    with profiling.phase("apic_decode"):
+        while True:
+            if suffix is None:
+                data, space, rest = chunk.partition(" ")
+                decoder.feed(data)
+                if space:
+                    suffix = rest
+            else:
+                suffix += chunk
 
-    parts = frames_txt.splitlines()
-    parts = [line.split("=", maxsplit=1) for line in parts]
-    parts = {k.strip(): v.strip() for k, v in parts}
+            if not chunk or chunk.endswith("\n"):
+                break
+            chunk = fileobj.readline(_CHUNK_SIZE)
 
-    frames = []
-    for frame, value in parts.items():
-        frame_cls = id3.Frames[frame]
-        if issubclass(frame_cls, id3.TextFrame):
-            frame = frame_cls(text=[value])
-        elif issubclass(frame_cls, id3.UrlFrame):
-            frame = frame_cls(url=value)
-        elif issubclass(frame_cls, id3.APIC):
-            frame = parse_apic(value)
-        else:
-            raise ValueError(f"{frame}: unsupported frame")
-        frames.append(frame)
-    return frames
+        try:
+            data = decoder.finish()
+        except ValueError:
+            raise ValueError("Invalid base64 value in APIC data URL")
 
+    picture_type = suffix.strip() if suffix and suffix.strip() else None
+    return utils.create_apic_frame(
+        data=data,
+        mime_type=mime_type,
+        picture_type=utils.get_apic_picture_type(picture_type),
+    )
 
-def parse_text_chapters(chapters_txt) -> t.List[id3.Frame]:
-    """Parse textual representation of metadata chapters."""
 
-    parts = chapters_txt.splitlines()
-    parts = [line.split(maxsplit=1) for line in parts]
-    parts = [(utils.parse_timestamp_to_ms(ts), text) for ts, text in parts]
+def parse_text_chapter(line: str) -> id3.Frame:
+    """Parse textual representation of a metadata chapter."""
 
-    return [
-        id3.CHAP(start_time=start_time, sub_frames=[id3.TIT2(text=text)])
-        for (start_time, text) in parts
-    ]
+    timestamp, text = line.split(maxsplit=1)
+    return id3.CHAP(
+        start_time=utils.parse_timestamp_to_ms(timestamp),
+        sub_frames=[id3.TIT2(text=text.rstrip("\r\n"))],
+    )
 
 
 def _parse_picture_type(value: str) -> t.Tuple[str, id3.PictureType]:
@@ -101,6 +164,12 @@ def _parse_data_url(path: str) -> t.Tuple[str, t.Optional[str]]:
     except ValueError:
         raise ValueError(f"Invalid data URL value: `data:{path}`")
 
+    return data, _parse_data_url_metadata(metadata)
+
+
+def _parse_data_url_metadata(metadata: str) -> t.Optional[str]:
+    # Expected format: "[mime-type][;base64]".
+
     try:
         mime_type, encoding = metadata.split(";", maxsplit=1)
     except ValueError:
@@ -110,7 +179,7 @@ def _parse_data_url(path: str) -> t.Tuple[str, t.Optional[str]]:
     if encoding and encoding != "base64":
         raise ValueError(f"Unsupported encoding: `{encoding}`")
 
-    return data, mime_type
+    return mime_type
 
 
 def parse_apic(value: str) -> id3.APIC:
@@ -132,16 +201,24 @@ def parse_apic(value: str) -> id3.APIC:
 
 
 def unparse_apic(frame: id3.APIC) -> str:
+    value = io.StringIO()
+    write_apic(value, frame)
+    return value.getvalue()
+
+
+def write_apic(fileobj: t.IO, frame: id3.APIC) -> None:
+    """Write textual representation of a picture frame into a stream."""
+
     if frame.mime == "-->":
         # Remote URL. Represented by its location.
-        value = frame.data.decode()
+        fileobj.write(frame.data.decode())
     else:
-        # Embedded data. Represented as a "data" URL.
-        data = base64.b64encode(frame.data).decode()
-        value = f"data:{frame.mime};base64,{data}"
+        # Embedded data. Represented as a "data" URL, which is encoded block
+        # by block right into the stream.
+        fileobj.write(f"data:{frame.mime};base64,")
+        with profiling.phase("apic_encode"):
+            utils.write_base64(fileobj, frame.data)
 
     if frame.type:
-        value += " "
-        value += str(frame.type).split(".")[-1]
-
-    return value
+        fileobj.write(" ")
+        fileobj.write(str(frame.type).split(".")[-1])
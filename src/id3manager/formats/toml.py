@@ -1,14 +1,37 @@
-import base64
-import collections
+import re
 import typing as t
 import urllib.parse as urlparse
 
 import mutagen.id3 as id3
-import tomlkit
 
-from .. import utils
+from .. import profiling, utils
 from .abc import MetadataFormatter
 
+try:
+    import tomllib
+
+    TOMLDecodeError = tomllib.TOMLDecodeError
+except ImportError:  # Python < 3.11
+    import tomlkit as tomllib
+
+    TOMLDecodeError = tomllib.exceptions.ParseError
+
+# Escape sequences of TOML basic strings. The rest of control characters are
+# escaped by their code points.
+_ESCAPES = {
+    **{code: f"\\u{code:04x}" for code in [*range(0x20), 0x7F]},
+    ord("\b"): "\\b",
+    ord("\t"): "\\t",
+    ord("\n"): "\\n",
+    ord("\f"): "\\f",
+    ord("\r"): "\\r",
+    ord('"'): '\\"',
+    ord("\\"): "\\\\",
+}
+
+# Escaped backslashes and quotes, which neither open nor close strings.
+_ESCAPED_QUOTES = re.compile(r'\\[\\"]')
+
 
 class TomlMetadataFormatter(MetadataFormatter):
     @property
@@ -16,59 +39,112 @@ class TomlMetadataFormatter(MetadataFormatter):
         return "toml"
 
     def read(self, fileobj: t.IO) -> t.List[id3.Frame]:
-        metadata = tomlkit.load(fileobj)
-
-        parsed_frames = []
-
-        for frame_name, frames in metadata.items():
-            for frame in frames:
-                frame_cls = id3.Frames[frame_name]
-
-                if issubclass(frame_cls, id3.TextFrame):
-                    frame = frame_cls(text=[frame["text"]])
-                elif issubclass(frame_cls, id3.UrlFrame):
-                    frame = frame_cls(url=frame["url"])
-                elif issubclass(frame_cls, id3.APIC):
-                    frame = parse_apic(frame)
-                elif issubclass(frame_cls, id3.CHAP):
-                    timestamp = utils.parse_timestamp_to_ms(frame["timestamp"])
-                    chapter_title = frame["text"]
-
-                    frame = frame_cls(
-                        start_time=timestamp,
-                        sub_frames=[id3.TIT2(text=chapter_title)],
-                    )
-                else:
-                    raise ValueError(f"{frame}: unsupported frame")
+        return list(self.iter_read(fileobj))
 
-                parsed_frames.append(frame)
+    def write(self, fileobj: t.IO, frames: t.List[id3.Frame]) -> None:
+        self.iter_write(fileobj, frames)
+
+    def iter_read(self, fileobj: t.IO) -> t.Iterator[id3.Frame]:
+        # Documents are arrays of tables, one table per frame. Instead of
+        # loading the whole document at once, tables are parsed one by one as
+        # their headers are encountered. A header-like line may also belong to
+        # a multiline string, in which case the chunk is not a complete TOML
+        # document yet and more lines are accumulated. Any other error is
+        # raised right away, as no more lines would ever fix it.
+        chunk = []
+
+        for line in fileobj:
+            if line.startswith("[[") and chunk:
+                document = "".join(chunk)
+                try:
+                    frames = list(_parse_frames(document))
+                except TOMLDecodeError:
+                    if not _has_open_multiline_string(document):
+                        raise
+                else:
+                    yield from frames
+                    chunk.clear()
+            chunk.append(line)
 
-        return parsed_frames
+        yield from _parse_frames("".join(chunk))
 
-    def write(self, fileobj: t.IO, frames: t.List[id3.Frame]) -> None:
-        output = collections.defaultdict(list)
+    def iter_write(self, fileobj: t.IO, frames: t.Iterable[id3.Frame]) -> None:
+        # Documents have a fixed shape, an array of tables with string values,
+        # hence they are written without a TOML library. Each frame is written
+        # as a separate table as soon as it comes, so unlike with tomlkit,
+        # frames of the same ID are not grouped together, but keep the order.
+        first = True
 
         for frame in frames:
             if isinstance(frame, id3.TextFrame):
-                output[frame.FrameID].append({"text": str(frame.text[0])})
+                table = {"text": str(frame.text[0])}
             elif isinstance(frame, id3.UrlFrame):
-                output[frame.FrameID].append({"url": frame.url})
+                table = {"url": frame.url}
             elif isinstance(frame, id3.APIC):
-                output[frame.FrameID].append(unparse_apic(frame))
+                table = unparse_apic(frame)
             elif isinstance(frame, id3.CHAP):
-                output[frame.FrameID].append(
-                    {
-                        "text": frame.sub_frames["TIT2"].text[0],
-                        "timestamp": utils.ms_to_human_time(frame.start_time),
-                    }
-                )
+                table = {
+                    "text": frame.sub_frames["TIT2"].text[0],
+                    "timestamp": utils.ms_to_human_time(frame.start_time),
+                }
             elif isinstance(frame, id3.CTOC):
                 # TODO: implement this when we add support for nested chapters
-                pass
+                continue
             else:
                 raise ValueError(f"{frame.FrameID}: unsupported frame")
 
-        tomlkit.dump(output, fileobj)
+            if not first:
+                fileobj.write("\n")
+            _write_table(fileobj, frame.FrameID, table)
+            first = False
+
+
+def _write_table(
+    fileobj: t.IO, name: str, table: t.Dict[str, t.Union[str, bytes]]
+) -> None:
+    fileobj.write(f"[[{name}]]\n")
+    for key, value in table.items():
+        if isinstance(value, bytes):
+            # Binary data is written as base64, which needs no escaping, block
+            # by block right into the stream.
+            fileobj.write(f'{key} = "')
+            with profiling.phase("apic_encode"):
+                utils.write_base64(fileobj, value)
+            fileobj.write('"\n')
+        else:
+            fileobj.write(f'{key} = "{value.translate(_ESCAPES)}"\n')
+
+
+def _has_open_multiline_string(document: str) -> bool:
+    document = _ESCAPED_QUOTES.sub("", document)
+    return document.count('"""') % 2 == 1 or document.count("'''") % 2 == 1
+
+
+def _parse_frames(document: str) -> t.Iterator[id3.Frame]:
+    for frame_name, frames in tomllib.loads(document).items():
+        for frame in frames:
+            yield parse_frame(frame_name, frame)
+
+
+def parse_frame(frame_name: str, frame: t.Dict[str, t.Any]) -> id3.Frame:
+    frame_cls = id3.Frames[frame_name]
+
+    if issubclass(frame_cls, id3.TextFrame):
+        return frame_cls(text=[frame["text"]])
+    elif issubclass(frame_cls, id3.UrlFrame):
+        return frame_cls(url=frame["url"])
+    elif issubclass(frame_cls, id3.APIC):
+        return parse_apic(frame)
+    elif issubclass(frame_cls, id3.CHAP):
+        timestamp = utils.parse_timestamp_to_ms(frame["timestamp"])
+        chapter_title = frame["text"]
+
+        return frame_cls(
+            start_time=timestamp,
+            sub_frames=[id3.TIT2(text=chapter_title)],
+        )
+    else:
+        raise ValueError(f"{frame}: unsupported frame")
 
 
 def parse_apic(frame: t.Dict[str, t.Any]) -> id3.APIC:
@@ -90,8 +166,8 @@ def unparse_apic(frame: id3.APIC) -> t.Dict[str, t.Any]:
         # Remote URL. Represented by its location.
         data["url"] = frame.data.decode()
     else:
-        # Embedded data. Base64 of the payload.
-        data["data"] = base64.b64encode(frame.data).decode()
+        # Embedded data. The payload is written as base64.
+        data["data"] = frame.data
 
     if frame.mime:
         data["mime_type"] = frame.mime
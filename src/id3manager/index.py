@@ -0,0 +1,171 @@
+import os
+import sqlite3
+import typing as t
+
+import mutagen.id3 as id3
+
+from . import batch, metadata, utils
+
+__all__ = [
+    "get_default_database",
+    "open_index",
+    "update_index",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT NOT NULL UNIQUE,
+    device INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS frames (
+    file_id INTEGER NOT NULL REFERENCES files (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    frame_id TEXT NOT NULL,
+    value TEXT,
+    size INTEGER NOT NULL,
+    data BLOB,
+    PRIMARY KEY (file_id, position)
+);
+
+CREATE INDEX IF NOT EXISTS frames_frame_id_value ON frames (frame_id, value);
+"""
+
+# Changes are committed in batches, so that an interrupted run keeps most of
+# its progress without paying for a transaction per file.
+COMMIT_EVERY = 500
+
+
+def get_default_database() -> str:
+    """Return the path to the default index database."""
+
+    return os.path.join(utils.get_cache_dir(), "index.sqlite3")
+
+
+def open_index(database: str) -> sqlite3.Connection:
+    """Open an index database, creating it if it does not exist."""
+
+    os.makedirs(os.path.dirname(os.path.abspath(database)), exist_ok=True)
+
+    connection = sqlite3.connect(database)
+    connection.execute("PRAGMA foreign_keys = ON")
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def index_frame(
+    frame: id3.Frame,
+) -> t.Tuple[str, t.Optional[str], int, t.Optional[bytes]]:
+    """Return the indexed columns of an ID3 frame.
+
+    These are its ID, its value as seen in the text format, its size and its
+    encoded data. Pictures are not stored, only their MIME type and size.
+    """
+
+    if isinstance(frame, id3.APIC):
+        return frame.FrameID, frame.mime, len(frame.data), None
+
+    if isinstance(frame, id3.TextFrame):
+        value = str(frame.text[0]) if frame.text else ""
+    elif isinstance(frame, id3.UrlFrame):
+        value = frame.url
+    elif isinstance(frame, id3.CHAP) and "TIT2" in frame.sub_frames:
+        value = frame.sub_frames["TIT2"].text[0]
+    else:
+        value = None
+
+    data = metadata.encode_frame(frame)
+    return frame.FrameID, value, len(data), data
+
+
+def index_file(item: t.Tuple[str, t.Tuple[int, ...]]) -> t.List[t.Tuple]:
+    """Return the indexed columns of all ID3 frames of a given audio file."""
+
+    audio, _ = item
+
+    tags = metadata.load_tags(audio)
+    if tags is None:
+        return []
+    return [index_frame(frame) for frame in tags.values()]
+
+
+def update_index(
+    connection: sqlite3.Connection,
+    paths: t.Iterable[str],
+    jobs: int = 1,
+) -> t.Iterator[t.Tuple[str, str, t.Optional[Exception]]]:
+    """Index ID3 frames of audio files, and yield (status, path, error) tuples.
+
+    Files are identified by their absolute paths and fingerprinted by their
+    device, inode, size and mtime, so only files that have been changed since
+    the last run are parsed again; the status of the rest is "unchanged".
+    Indexed files that no longer exist under given directories are "removed".
+    """
+
+    paths = [os.path.abspath(path) for path in paths]
+    known = {
+        row[0]: tuple(row[1:])
+        for row in connection.execute(
+            "SELECT path, id, device, inode, size, mtime FROM files"
+        )
+    }
+    seen = set()
+
+    def iter_changed():
+        for audio in batch.iter_audio_files(paths):
+            seen.add(audio)
+            try:
+                st = os.stat(audio)
+            except OSError as exc:
+                yield batch.Skip(("failed", audio, exc))
+                continue
+
+            fingerprint = (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+            if audio in known and known[audio][1:] == fingerprint:
+                yield batch.Skip(("unchanged", audio, None))
+                continue
+            yield audio, fingerprint
+
+    written = 0
+    for item, future in batch.imap_skipping(index_file, iter_changed(), jobs):
+        if future is None:
+            yield item
+            continue
+
+        audio, fingerprint = item
+        try:
+            frames = future.result()
+        except Exception as exc:
+            yield "failed", audio, exc
+            continue
+
+        if audio in known:
+            connection.execute("DELETE FROM files WHERE id = ?", (known[audio][0],))
+        file_id = connection.execute(
+            "INSERT INTO files (path, device, inode, size, mtime) VALUES (?, ?, ?, ?, ?)",
+            (audio, *fingerprint),
+        ).lastrowid
+        connection.executemany(
+            "INSERT INTO frames VALUES (?, ?, ?, ?, ?, ?)",
+            [(file_id, position, *frame) for position, frame in enumerate(frames)],
+        )
+
+        written += 1
+        if written % COMMIT_EVERY == 0:
+            connection.commit()
+        yield "indexed", audio, None
+
+    directories = [path for path in paths if os.path.isdir(path)]
+    for audio, (file_id, *_) in known.items():
+        if audio in seen:
+            continue
+        if any(audio.startswith(os.path.join(path, "")) for path in directories):
+            connection.execute("DELETE FROM files WHERE id = ?", (file_id,))
+            yield "removed", audio, None
+
+    connection.commit()
@@ -1,24 +1,41 @@
+import functools
 import typing as t
 
 import mutagen.id3 as id3
 
 from . import utils
 from .formats import get_metadata_formatter
+from .padding import PaddingPolicy
 
 __all__ = [
     "read_metadata",
     "write_metadata",
+    "load_tags",
+    "merge_frames",
+    "encode_frame",
+    "decode_frames",
     "ID3SourceFrameOrder",
+    "PaddingPolicy",
 ]
 
 
-def read_metadata(fileobj: t.IO, format: str, audio_len: float) -> t.List[id3.Frame]:
-    """Build an in-memory representation of ID3 frames from a serialized metadata."""
+def read_metadata(
+    fileobj: t.IO, format: str, audio_len: t.Callable[[], float]
+) -> t.List[id3.Frame]:
+    """Build an in-memory representation of ID3 frames from a serialized metadata.
+
+    The audio length is only needed to generate the end time of the last
+    chapter, so it's passed as a callable that is called only then.
+    """
+
+    formatter = get_metadata_formatter(format)
+    if formatter.complete_chapters:
+        return list(formatter.iter_read(fileobj))
 
     frames = []
     chapters = []
 
-    for frame in get_metadata_formatter(format).read(fileobj):
+    for frame in formatter.iter_read(fileobj):
         if frame.FrameID not in {"CHAP", "CTOC"}:
             frames.append(frame)
         elif frame.FrameID == "CHAP":
@@ -28,14 +45,128 @@ def read_metadata(fileobj: t.IO, format: str, audio_len: float) -> t.List[id3.Fr
             # we would need to handle CTOC to support nested chapters
             continue
 
-    frames.extend(chapters_from_parts(chapters, audio_len))
+    if chapters:
+        frames.extend(chapters_from_parts(chapters, audio_len()))
     return frames
 
 
-def write_metadata(fileobj: t.IO, format: str, frames: t.List[id3.Frame]) -> None:
+def merge_frames(
+    frames: t.Iterable[id3.Frame], updates: t.Iterable[id3.Frame]
+) -> t.List[id3.Frame]:
+    """Return frames with those of IDs present in updates replaced by them.
+
+    Updating frames take the place of the first replaced frame of the same
+    ID, so the order of frames is retained; frames of new IDs are appended.
+    Since CTOC is generated along with chapters, it's replaced only when
+    chapters are.
+    """
+
+    updates_by_id = {}
+    for frame in updates:
+        updates_by_id.setdefault(frame.FrameID, []).append(frame)
+
+    merged = []
+    for frame in frames:
+        if frame.FrameID not in updates_by_id:
+            merged.append(frame)
+        elif updates_by_id[frame.FrameID] is not None:
+            merged.extend(updates_by_id[frame.FrameID])
+            updates_by_id[frame.FrameID] = None
+
+    for updating in updates_by_id.values():
+        if updating is not None:
+            merged.extend(updating)
+    return merged
+
+
+def write_metadata(fileobj: t.IO, format: str, frames: t.Iterable[id3.Frame]) -> None:
     """Serialize an in-memory representation of ID3 frames into a stream of bytes."""
 
-    return get_metadata_formatter(format).write(fileobj, frames)
+    return get_metadata_formatter(format).iter_write(fileobj, frames)
+
+
+def load_tags(
+    audio: t.Union[str, t.IO],
+    frame_ids: t.Optional[t.AbstractSet[str]] = None,
+) -> t.Optional["ID3SourceFrameOrder"]:
+    """Load ID3 tags of a given audio file without touching its audio stream.
+
+    Unlike `mutagen.mp3.MP3`, which also scans MPEG frames and Xing/VBRI
+    headers to compute the audio length, this reads the 10-byte ID3v2 header,
+    then exactly as many bytes as the tag size it declares, and decodes frames
+    from that buffer. The only other read is the 128-byte ID3v1 lookup at the
+    end of the file, so loading costs a few kilobytes of I/O per file.
+
+    If frame IDs are given, only frames of these IDs are decoded, while the
+    rest, e.g. large pictures, are skipped by their size headers. Sub-frames
+    of chapters are restricted likewise, except for their titles. Such tags
+    are meant for reading only, and must not be saved.
+    """
+
+    try:
+        if frame_ids is None:
+            return ID3SourceFrameOrder(audio)
+
+        tags = ID3SourceFrameOrder(
+            audio, known_frames=_get_known_frames(frozenset(frame_ids))
+        )
+    except id3.ID3NoHeaderError:
+        return None
+
+    # Titles are decoded for chapters, even if they are not requested.
+    for key, frame in list(tags.items()):
+        if frame.FrameID not in frame_ids:
+            del tags[key]
+    tags.unknown_frames = []
+    return tags
+
+
+# Frames of older ID3 versions that are translated to ID3v2.4 frames.
+_LEGACY_FRAMES = {
+    "TDRC": {"TYER", "TDAT", "TIME"},
+    "TDOR": {"TORY"},
+    "TIPL": {"IPLS"},
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _get_known_frames(frame_ids: t.FrozenSet[str]) -> t.Dict[str, t.Type[id3.Frame]]:
+    frame_ids = set(frame_ids)
+    if frame_ids & {"CHAP", "CTOC"}:
+        frame_ids.add("TIT2")
+    for frame_id in list(frame_ids):
+        frame_ids |= _LEGACY_FRAMES.get(frame_id, set())
+
+    # ID3v2.2 frames have their own IDs, but subclass their successors.
+    known_frames = {
+        name: frame_cls
+        for name, frame_cls in id3.Frames_2_2.items()
+        if frame_cls.__base__.__name__ in frame_ids
+    }
+    known_frames.update(
+        (name, frame_cls) for name, frame_cls in id3.Frames.items() if name in frame_ids
+    )
+    return known_frames
+
+
+def encode_frame(frame: id3.Frame) -> bytes:
+    """Encode an ID3 frame, header included, as it's stored in ID3v2.4 tags."""
+
+    from mutagen.id3._tags import save_frame
+    from mutagen.id3._util import ID3SaveConfig
+
+    return save_frame(frame, config=ID3SaveConfig(v2_version=4, v23_separator="/"))
+
+
+def decode_frames(data: bytes) -> t.List[id3.Frame]:
+    """Decode a sequence of ID3 frames encoded with `encode_frame`."""
+
+    from mutagen.id3._tags import ID3Header, read_frames
+
+    header = ID3Header()
+    header.version = ID3Header._V24
+    frames, _, _ = read_frames(header, data, header.known_frames)
+    return frames
 
 
 class ID3SourceFrameOrder(id3.ID3):
@@ -57,8 +188,37 @@ class ID3SourceFrameOrder(id3.ID3):
         from mutagen.id3._tags import save_frame
 
         framedata = [save_frame(f, config=config) for f in self.values()]
+
+        # Like mutagen does, unknown frames are written back only if they
+        # have been loaded from the version the tag is saved with.
+        if self._unknown_v2_version == config.v2_version:
+            framedata.extend(data for data in self.unknown_frames if len(data) > 10)
+
         return bytearray().join(framedata)
 
+    def is_pristine(self) -> bool:
+        """Return whether saving unmodified tags would produce the same data.
+
+        This is the case for ID3v2.4 tags without unknown frames, extended
+        header and unsynchronisation, since these are not written back.
+        """
+
+        return (
+            self.version == (2, 4, 0)
+            and not self.unknown_frames
+            and not self.f_extended
+            and not self.f_unsynch
+        )
+
+    def serialize(self, v2_version: int = 4) -> bytes:
+        """Return frames data as they would be saved, excluding the padding."""
+
+        from mutagen.id3._util import ID3SaveConfig
+
+        return bytes(
+            self._write(ID3SaveConfig(v2_version=v2_version, v23_separator="/"))
+        )
+
 
 def chapters_from_parts(
     parts: t.List[id3.Frame], audio_len: float
@@ -0,0 +1,59 @@
+import typing as t
+
+if t.TYPE_CHECKING:
+    import mutagen
+
+__all__ = [
+    "PaddingPolicy",
+]
+
+
+class PaddingPolicy:
+    """The padding policy of ID3 tags, usable as a mutagen padding callback.
+
+    The policy is given as a string: "keep", "fixed:N" (N bytes) or
+    "percent:P" (P percent of the audio data size). Whenever a new tag fits
+    into the space taken by the old one, the old size is retained, so only
+    the tag region is overwritten in-place. Otherwise, the tag grows and the
+    audio data is shifted once, with the amount of padding defined by the
+    policy ("keep" uses mutagen's defaults) reserved for future edits.
+    """
+
+    def __init__(self, spec: str = "keep"):
+        kind, _, value = spec.partition(":")
+
+        if kind == "keep" and not value:
+            self._amount = None
+        elif kind == "fixed" and value.isdigit():
+            self._amount = int(value)
+        elif kind == "percent" and _is_percent(value):
+            self._amount = float(value) / 100
+        else:
+            raise ValueError(f"Invalid padding policy: `{spec}`")
+
+        self.kind = kind
+        self.spec = spec
+
+    def __call__(self, info: "mutagen.PaddingInfo") -> int:
+        if info.padding >= 0:
+            return info.padding
+        return self.amount(info)
+
+    def __repr__(self):
+        return f"PaddingPolicy({self.spec!r})"
+
+    def amount(self, info: "mutagen.PaddingInfo") -> int:
+        """Return the amount of padding to reserve when the tag is resized."""
+
+        if self.kind == "fixed":
+            return self._amount
+        elif self.kind == "percent":
+            return int(info.size * self._amount)
+        return info.get_default_padding()
+
+
+def _is_percent(value: str) -> bool:
+    try:
+        return 0 <= float(value) <= 100
+    except ValueError:
+        return False
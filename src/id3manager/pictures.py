@@ -0,0 +1,169 @@
+import collections
+import functools
+import hashlib
+import mimetypes
+import os
+import secrets
+import threading
+import typing as t
+
+import mutagen.id3 as id3
+
+__all__ = [
+    "ArtworkCache",
+    "PictureStore",
+    "artwork_cache",
+    "get_picture_store",
+]
+
+CacheInfo = collections.namedtuple(
+    "CacheInfo", ["hits", "misses", "maxsize", "currsize", "maxbytes", "currbytes"]
+)
+
+
+class ArtworkCache:
+    """LRU cache of pictures loaded from local files.
+
+    The same artwork is usually shared by many files, e.g. a cover of a whole
+    podcast season, so it's loaded from disk once instead of once per file.
+    Entries are keyed by path and validated by the file's inode, mtime and
+    size, so a picture replaced on disk is loaded anew. The cache is bounded
+    both by the number of entries and their total size; pictures larger than
+    the latter are never cached.
+    """
+
+    def __init__(self, maxsize: int = 128, maxbytes: int = 64 * 1024 * 1024):
+        self.maxsize = maxsize
+        self.maxbytes = maxbytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._currbytes = 0
+        # The cache is shared by threads of the daemon.
+        self._lock = threading.Lock()
+
+    def load(self, path: str) -> t.Tuple[bytes, t.Optional[str]]:
+        """Return the content of a picture file and its guessed MIME type."""
+
+        st = os.stat(path)
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == stamp:
+                self.hits += 1
+                self._entries.move_to_end(path)
+                return entry[1], entry[2]
+
+            self.misses += 1
+            self._evict(path)
+
+        with open(path, "rb") as fp:
+            data = fp.read()
+        mime_type, _ = mimetypes.guess_type(path)
+
+        if len(data) <= self.maxbytes:
+            with self._lock:
+                self._evict(path)
+                self._entries[path] = (stamp, data, mime_type)
+                self._currbytes += len(data)
+
+                while (
+                    len(self._entries) > self.maxsize or self._currbytes > self.maxbytes
+                ):
+                    self._evict(next(iter(self._entries)))
+
+        return data, mime_type
+
+    def info(self) -> CacheInfo:
+        """Return statistics of the cache."""
+
+        return CacheInfo(
+            self.hits,
+            self.misses,
+            self.maxsize,
+            len(self._entries),
+            self.maxbytes,
+            self._currbytes,
+        )
+
+    def _evict(self, path: str) -> None:
+        entry = self._entries.pop(path, None)
+        if entry is not None:
+            self._currbytes -= len(entry[1])
+
+    def clear(self) -> None:
+        """Clear the cache and its statistics."""
+
+        with self._lock:
+            self._entries.clear()
+            self._currbytes = 0
+            self.hits = self.misses = 0
+
+
+class PictureStore:
+    """Content-addressed storage of pictures extracted from APIC frames.
+
+    Each picture is stored once under the hash of its content, so the same
+    artwork shared by many files takes disk space, and is written, only once.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = os.path.abspath(directory)
+        self._stored = {}
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    def store(self, data: bytes, mime_type: str) -> str:
+        """Store a picture, unless it's already stored, and return its path."""
+
+        digest = hashlib.sha256(data).hexdigest()
+
+        path = self._stored.get(digest)
+        if path is not None:
+            return path
+
+        extension = mimetypes.guess_extension(mime_type) if mime_type else None
+        path = os.path.join(self.directory, digest + (extension or ""))
+
+        if not os.path.exists(path):
+            # Other processes may store the same picture concurrently, hence
+            # it's written to a temporary file first and then atomically moved.
+            # Unlike the ones of `tempfile`, which are private to the owner,
+            # the file is created with permissions per umask, as pictures are
+            # meant to be shared.
+            temp_path = f"{path}.{secrets.token_hex(8)}.tmp"
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+            with open(fd, "wb") as fp:
+                fp.write(data)
+            os.replace(temp_path, path)
+
+        self._stored[digest] = path
+        return path
+
+    def externalize(self, frame: id3.Frame) -> id3.Frame:
+        """Return a frame referring to the stored picture instead of embedding it."""
+
+        if not isinstance(frame, id3.APIC) or frame.mime == "-->":
+            return frame
+
+        import urllib.request
+
+        path = self.store(frame.data, frame.mime)
+        return id3.APIC(
+            encoding=frame.encoding,
+            mime="-->",
+            type=frame.type,
+            desc=frame.desc,
+            data=f"file://{urllib.request.pathname2url(path)}".encode(),
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def get_picture_store(directory: str) -> PictureStore:
+    """Return a picture store that is shared by all files of the process."""
+
+    return PictureStore(directory)
+
+
+artwork_cache = ArtworkCache()
@@ -0,0 +1,130 @@
+import contextlib
+import time
+import typing as t
+
+__all__ = [
+    "Profiler",
+    "enable",
+    "disable",
+    "phase",
+]
+
+
+class PhaseStats(t.NamedTuple):
+    calls: int
+    wall: float
+    peak: int
+
+
+class Profiler:
+    """Wall time and peak memory of named phases of a command.
+
+    Phases may be nested, e.g. decoding of pictures happens while a metadata
+    document is parsed, in which case the time and memory of the inner phase
+    are accounted for both phases. The peak memory of a phase is the largest
+    amount of memory allocated on top of what had been allocated when it was
+    entered, as seen by `tracemalloc`. Phases entered many times, e.g. once
+    per file, are aggregated: their wall time is summed up while their peak
+    memory is the largest of all.
+    """
+
+    def __init__(self):
+        # Imported here, since it's relatively slow to import and profiling
+        # is rarely enabled.
+        import tracemalloc
+
+        self._tracemalloc = tracemalloc
+        self.phases = {}
+        self.wall = 0.0
+        self.peak = 0
+        self._stack = []
+        self._started = None
+
+    def start(self) -> None:
+        self._tracemalloc.start()
+        self._stack.append([0, 0])
+        self._started = time.perf_counter()
+
+    def stop(self) -> None:
+        self.wall = time.perf_counter() - self._started
+        start, peak = self._stack.pop()
+        self.peak = max(peak, self._tracemalloc.get_traced_memory()[1]) - start
+        self._tracemalloc.stop()
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> t.Iterator[None]:
+        current, peak = self._tracemalloc.get_traced_memory()
+
+        # The peak counter is global, and is reset for every phase. Hence the
+        # peak of an enclosing phase is saved before resetting it.
+        if self._stack:
+            self._stack[-1][1] = max(self._stack[-1][1], peak)
+        self._stack.append([current, current])
+        self._tracemalloc.reset_peak()
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - started
+            start, peak = self._stack.pop()
+            peak = max(peak, self._tracemalloc.get_traced_memory()[1]) - start
+
+            stats = self.phases.get(name, PhaseStats(0, 0.0, 0))
+            self.phases[name] = PhaseStats(
+                stats.calls + 1, stats.wall + wall, max(stats.peak, peak)
+            )
+
+    def report(self) -> t.Dict[str, t.Any]:
+        """Return the collected statistics as a JSON serializable object."""
+
+        return {
+            "wall": self.wall,
+            "peak": self.peak,
+            "phases": {name: stats._asdict() for name, stats in self.phases.items()},
+        }
+
+    def format(self) -> str:
+        """Return the collected statistics as a human readable table."""
+
+        lines = [f"{'phase':20} {'calls':>8} {'wall, s':>12} {'peak, KiB':>12}"]
+        for name, stats in self.phases.items():
+            lines.append(
+                f"{name:20} {stats.calls:8} {stats.wall:12.6f} {stats.peak / 1024:12.1f}"
+            )
+        lines.append(f"{'total':20} {'':8} {self.wall:12.6f} {self.peak / 1024:12.1f}")
+        return "\n".join(lines)
+
+
+_profiler: t.Optional[Profiler] = None
+
+
+def enable() -> Profiler:
+    """Start profiling of phases of the current process."""
+
+    global _profiler
+
+    _profiler = Profiler()
+    _profiler.start()
+    return _profiler
+
+
+def disable() -> None:
+    """Stop profiling of phases of the current process."""
+
+    global _profiler
+
+    if _profiler is not None:
+        _profiler.stop()
+    _profiler = None
+
+
+def phase(name: str) -> t.ContextManager[None]:
+    """Return a context manager accounting its body to a given phase.
+
+    It costs next to nothing if profiling is not enabled.
+    """
+
+    if _profiler is None:
+        return contextlib.nullcontext()
+    return _profiler.phase(name)
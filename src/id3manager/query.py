@@ -0,0 +1,216 @@
+import re
+import sqlite3
+import typing as t
+
+import mutagen.id3 as id3
+
+from . import metadata
+
+__all__ = [
+    "compile_query",
+    "run_query",
+]
+
+_TOKEN_RE = re.compile(
+    r"""
+    \s*(?:
+        (?P<paren>[()])
+        | (?P<op>!=|<=|>=|=|<|>|~)
+        | "(?P<dquoted>(?:[^"\\]|\\.)*)"
+        | '(?P<squoted>[^']*)'
+        | (?P<word>[^\s()=!<>~"']+)
+    )
+    """,
+    re.VERBOSE,
+)
+
+_KEYWORDS = {"AND", "OR", "NOT"}
+
+
+class _Token(t.NamedTuple):
+    kind: str
+    value: str
+
+
+def _tokenize(query: str) -> t.List[_Token]:
+    tokens = []
+    position = 0
+    query = query.rstrip()
+
+    while position < len(query):
+        match = _TOKEN_RE.match(query, position)
+        if match is None or match.end() == position:
+            raise ValueError(f"Invalid query near: `{query[position:]}`")
+        position = match.end()
+
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind == "dquoted":
+            kind, value = "string", re.sub(r"\\(.)", r"\1", value)
+        elif kind == "squoted":
+            kind = "string"
+        elif kind == "word" and value.upper() in _KEYWORDS:
+            kind, value = "keyword", value.upper()
+        tokens.append(_Token(kind, value))
+
+    return tokens
+
+
+class _Parser:
+    """Compile a query into an SQL condition over the `files` table.
+
+    Grammar:
+        expr      := term ("OR" term)*
+        term      := factor ("AND" factor)*
+        factor    := "NOT" factor | "(" expr ")" | predicate
+        predicate := FRAME [op value]
+    """
+
+    def __init__(self, query: str):
+        self.tokens = _tokenize(query)
+        self.position = 0
+        self.params = []
+
+    def parse(self) -> str:
+        if not self.tokens:
+            raise ValueError("Empty query")
+
+        condition = self._expr()
+        if self.position != len(self.tokens):
+            raise ValueError(f"Unexpected token: `{self.tokens[self.position].value}`")
+        return condition
+
+    def _peek(self) -> t.Optional[_Token]:
+        if self.position < len(self.tokens):
+            return self.tokens[self.position]
+        return None
+
+    def _next(self, description: str) -> _Token:
+        token = self._peek()
+        if token is None:
+            raise ValueError(f"Unexpected end of query, expected {description}")
+        self.position += 1
+        return token
+
+    def _accept(self, kind: str, value: str) -> bool:
+        if self._peek() == _Token(kind, value):
+            self.position += 1
+            return True
+        return False
+
+    def _expr(self) -> str:
+        conditions = [self._term()]
+        while self._accept("keyword", "OR"):
+            conditions.append(self._term())
+        return conditions[0] if len(conditions) == 1 else f"({' OR '.join(conditions)})"
+
+    def _term(self) -> str:
+        conditions = [self._factor()]
+        while self._accept("keyword", "AND"):
+            conditions.append(self._factor())
+        return (
+            conditions[0] if len(conditions) == 1 else f"({' AND '.join(conditions)})"
+        )
+
+    def _factor(self) -> str:
+        if self._accept("keyword", "NOT"):
+            return f"NOT {self._factor()}"
+
+        if self._accept("paren", "("):
+            condition = self._expr()
+            if not self._accept("paren", ")"):
+                raise ValueError("Unbalanced parentheses")
+            return condition
+
+        return self._predicate()
+
+    def _predicate(self) -> str:
+        token = self._next("a frame")
+        if token.kind != "word" or token.value not in id3.Frames:
+            raise ValueError(f"Invalid frame: `{token.value}`")
+        frame_id = token.value
+
+        token = self._peek()
+        if token is None or token.kind != "op":
+            return self._exists(frame_id)
+        self.position += 1
+        op = token.value
+
+        token = self._next("a value")
+        if token.kind not in {"word", "string"}:
+            raise ValueError(f"Invalid value: `{token.value}`")
+        value = token.value
+
+        if op == "=":
+            return self._exists(frame_id, " AND value = ?", value)
+        elif op == "!=":
+            return f"NOT {self._exists(frame_id, ' AND value = ?', value)}"
+        elif op == "~":
+            return self._exists(frame_id, " AND instr(value, ?) > 0", value)
+
+        try:
+            number = float(value)
+        except ValueError:
+            raise ValueError(f"Invalid number: `{value}`") from None
+
+        if frame_id == "CHAP":
+            # The number of chapters.
+            self.params.append(number)
+            return (
+                "(SELECT COUNT(*) FROM frames"
+                f" WHERE file_id = files.id AND frame_id = 'CHAP') {op} ?"
+            )
+        elif frame_id == "APIC":
+            # The size of a picture in bytes.
+            return self._exists(frame_id, f" AND size {op} ?", number)
+        else:
+            return self._exists(frame_id, f" AND CAST(value AS REAL) {op} ?", number)
+
+    def _exists(self, frame_id: str, condition: str = "", *params: t.Any) -> str:
+        self.params.append(frame_id)
+        self.params.extend(params)
+        return (
+            "EXISTS (SELECT 1 FROM frames"
+            f" WHERE file_id = files.id AND frame_id = ?{condition})"
+        )
+
+
+def compile_query(query: str) -> t.Tuple[str, t.List[t.Any]]:
+    """Compile a query into an SQL condition over indexed files and its parameters.
+
+    A query is a boolean expression of predicates over frames, combined with
+    AND, OR, NOT and parentheses. A predicate is either a frame ID, which
+    matches files having such frame, or a comparison of its value: "=", "!="
+    and "~" (contains) compare text values as seen in the text format, while
+    "<", "<=", ">" and ">=" compare numbers. For CHAP, it's the number of
+    chapters; for APIC, it's the size of a picture in bytes. E.g.:
+
+        TCON=Podcast AND NOT TLAN
+        TALB~"Шо по коду" AND (CHAP>10 OR APIC>1000000)
+    """
+
+    parser = _Parser(query)
+    return parser.parse(), parser.params
+
+
+def run_query(
+    connection: sqlite3.Connection, query: str
+) -> t.Iterator[t.Tuple[str, t.List[id3.Frame]]]:
+    """Yield paths and frames of indexed files matching a given query.
+
+    Files are yielded as they are found. Since pictures are not stored in the
+    index, APIC frames are not included.
+    """
+
+    condition, params = compile_query(query)
+
+    files = connection.execute(
+        f"SELECT id, path FROM files WHERE {condition} ORDER BY path", params
+    )
+    for file_id, path in files:
+        blobs = connection.execute(
+            "SELECT data FROM frames"
+            " WHERE file_id = ? AND data IS NOT NULL ORDER BY position",
+            (file_id,),
+        )
+        yield path, metadata.decode_frames(b"".join(blob for blob, in blobs))
@@ -0,0 +1,161 @@
+import concurrent.futures
+import contextlib
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+import typing as t
+
+from . import client, metadata, tagging
+
+__all__ = [
+    "handle_request",
+    "serve",
+]
+
+
+class _PathLocks:
+    """Per-file locks, so that a file is never processed by two requests at once.
+
+    Otherwise, a file could be read while it's being written. Locks are
+    dropped as soon as they are released, so that a long-running daemon does
+    not accumulate a lock per file it has ever seen.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._locks = {}
+
+    @contextlib.contextmanager
+    def hold(self, path: str) -> t.Iterator[None]:
+        path = os.path.realpath(path)
+
+        with self._lock:
+            lock, users = self._locks.get(path, (threading.Lock(), 0))
+            self._locks[path] = (lock, users + 1)
+
+        try:
+            with lock:
+                yield
+        finally:
+            with self._lock:
+                lock, users = self._locks[path]
+                if users == 1:
+                    del self._locks[path]
+                else:
+                    self._locks[path] = (lock, users - 1)
+
+
+_path_locks = _PathLocks()
+
+
+def handle_request(request: t.Dict[str, t.Any]) -> t.Dict[str, t.Any]:
+    """Execute a get or set request, and return its response.
+
+    Requests are JSON objects with the "command" ("get" or "set"), the
+    absolute path to the "audio" file and its metadata "format". Set
+    requests also come with the "document" to set, and optionally the
+    "padding" policy, the "duration" mode and whether to "merge" it, while
+    get requests may come with the "pictures_dir" to extract pictures to and
+    the list of "frames" IDs to get.
+    Responses are JSON objects with the "output" of get requests, or whether
+    the file has been "updated" by set requests, or the "error" if a request
+    has failed.
+    """
+
+    try:
+        command, audio = request["command"], request["audio"]
+
+        with _path_locks.hold(audio):
+            if command == "get":
+                output = tagging.get_metadata(
+                    audio,
+                    request["format"],
+                    pictures_dir=request.get("pictures_dir"),
+                    frame_ids=_get_frame_ids(request),
+                )
+                return {"output": output}
+            elif command == "set":
+                updated = tagging.set_metadata_from_string(
+                    (audio, request["document"]),
+                    request["format"],
+                    padding=metadata.PaddingPolicy(request.get("padding", "keep")),
+                    duration_mode=request.get("duration", "exact"),
+                    merge=request.get("merge", False),
+                )
+                return {"updated": updated}
+            else:
+                raise ValueError(f"{command}: unsupported command")
+    except KeyError as exc:
+        return {"error": f"invalid request: missing {exc}"}
+    except Exception as exc:
+        return {"error": str(exc)}
+
+
+def _get_frame_ids(request: t.Dict[str, t.Any]) -> t.Optional[t.FrozenSet[str]]:
+    frame_ids = request.get("frames")
+    return None if frame_ids is None else frozenset(frame_ids)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        # A connection may carry many requests, one JSON object per line.
+        for line in self.rfile:
+            try:
+                response = handle_request(json.loads(line))
+            except ValueError as exc:
+                response = {"error": f"invalid request: {exc}"}
+            self.wfile.write(json.dumps(response, ensure_ascii=False).encode() + b"\n")
+            self.wfile.flush()
+
+
+class _Server(socketserver.UnixStreamServer):
+    """A UNIX socket server handling connections in a pool of threads."""
+
+    def __init__(self, path: str, jobs: int):
+        super().__init__(path, _RequestHandler)
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=jobs)
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=True)
+
+
+def serve(path: str, jobs: int = 0) -> None:
+    """Serve get and set requests over a UNIX socket until interrupted.
+
+    Modules and formatters, as well as caches, stay warm between requests.
+    Requests are handled concurrently by a pool of threads, but requests to
+    the same file are handled one at a time.
+    """
+
+    if os.path.exists(path):
+        # A socket left behind by a daemon that has been killed.
+        if client.is_listening(path):
+            raise RuntimeError(f"{path}: daemon is already running")
+        os.unlink(path)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    server = _Server(path, jobs or os.cpu_count() or 1)
+    os.chmod(path, 0o600)
+
+    # Stop gracefully on SIGTERM too, so that the socket is removed.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.unlink(path)
@@ -0,0 +1,145 @@
+import functools
+import hashlib
+import json
+import os
+import tempfile
+import typing as t
+
+from . import batch, formats, metadata, tagging, utils
+
+__all__ = [
+    "get_default_state",
+    "load_state",
+    "save_state",
+    "sync_sidecars",
+]
+
+STATE_VERSION = 1
+
+
+def get_default_state(directory: str) -> str:
+    """Return the path to the default state file of a given directory."""
+
+    digest = hashlib.sha256(os.path.realpath(directory).encode("utf-8")).hexdigest()
+    return os.path.join(utils.get_cache_dir(), "sync", f"{digest[:16]}.json")
+
+
+def load_state(path: str) -> t.Dict[str, t.Any]:
+    """Load a state file, or return an empty state if there's none.
+
+    A state file that can't be read is treated as if there's none, i.e. all
+    sidecar documents are applied again.
+    """
+
+    try:
+        with open(path, encoding="utf-8") as fp:
+            state = json.load(fp)
+    except (OSError, ValueError):
+        state = None
+
+    if not isinstance(state, dict) or state.get("version") != STATE_VERSION:
+        state = {"version": STATE_VERSION, "files": {}}
+    return state
+
+
+def save_state(path: str, state: t.Dict[str, t.Any]) -> None:
+    """Atomically write a state file, creating its directory if needed."""
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=directory, delete=False
+    ) as fp:
+        json.dump(state, fp, sort_keys=True)
+    os.replace(fp.name, path)
+
+
+def sync_sidecars(
+    state: t.Dict[str, t.Any],
+    directory: str,
+    format: str,
+    padding: t.Optional[metadata.PaddingPolicy] = None,
+    duration_mode: str = "exact",
+    jobs: int = 1,
+) -> t.Iterator[t.Tuple[str, str, t.Optional[Exception]]]:
+    """Apply changed sidecar documents, and yield (status, path, error) tuples.
+
+    Every sidecar document is hashed, and applied to its audio file only if
+    its hash or the audio file's size and mtime differ from the ones recorded
+    in the state by a previous successful apply. The status of an applied
+    document is "updated" or "unchanged", depending on whether the audio file
+    has been written to, and "skipped" if it hasn't been applied at all. The
+    state is updated in-place: failed applies are not recorded, so they are
+    retried next time, and files without sidecar documents are forgotten.
+    """
+
+    known = state["files"]
+    seen = {}
+    digests = {}
+
+    def iter_changed():
+        for audio, sidecar in batch.iter_sidecars(directory, extension):
+            key = os.path.relpath(audio, directory)
+            try:
+                with open(sidecar, "rb") as fp:
+                    content = fp.read()
+                document = content.decode("utf-8")
+                st = os.stat(audio)
+            except (OSError, ValueError) as exc:
+                yield batch.Skip(("failed", audio, exc))
+                continue
+
+            digest = hashlib.sha256(content).hexdigest()
+            entry = known.get(key)
+            if entry and entry == {"sha256": digest, "audio": _fingerprint(st)}:
+                seen[key] = entry
+                yield batch.Skip(("skipped", audio, None))
+                continue
+
+            digests[audio] = digest
+            yield audio, document
+
+    extension = formats.get_metadata_formatter(format).extension
+    results = batch.imap_skipping(
+        functools.partial(
+            tagging.set_metadata_from_string,
+            format=format,
+            padding=padding,
+            duration_mode=duration_mode,
+        ),
+        iter_changed(),
+        jobs=jobs,
+    )
+
+    completed = False
+    try:
+        for item, future in results:
+            if future is None:
+                yield item
+                continue
+
+            audio, _ = item
+            digest = digests.pop(audio)
+            try:
+                updated = future.result()
+                st = os.stat(audio)
+            except Exception as exc:
+                yield "failed", audio, exc
+                continue
+
+            seen[os.path.relpath(audio, directory)] = {
+                "sha256": digest,
+                "audio": _fingerprint(st),
+            }
+            yield ("updated" if updated else "unchanged"), audio, None
+
+        completed = True
+    finally:
+        # Entries of files that haven't been reached are kept, so that an
+        # interrupted run doesn't make the next one apply everything again.
+        state["files"] = seen if completed else {**known, **seen}
+
+
+def _fingerprint(st: os.stat_result) -> t.List[int]:
+    return [st.st_size, st.st_mtime_ns]
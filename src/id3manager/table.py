@@ -0,0 +1,64 @@
+import typing as t
+
+import mutagen.id3 as id3
+
+from . import metadata
+
+__all__ = [
+    "DEFAULT_COLUMNS",
+    "DIALECTS",
+    "get_row",
+]
+
+DEFAULT_COLUMNS = ("TIT2", "TPE1", "TALB", "TDRC", "TRCK", "TCON", "CHAP")
+
+# Dialects of the `csv` module per table format. Rows are terminated by line
+# feeds like the rest of the output, rather than by CRLF.
+DIALECTS = {
+    "csv": {"dialect": "excel", "lineterminator": "\n"},
+    "tsv": {"dialect": "excel-tab", "lineterminator": "\n"},
+}
+
+# Multiple values of a cell, e.g. of a multi-value text frame, are joined by
+# this separator.
+VALUE_SEPARATOR = "; "
+
+
+def get_row(audio: str, frame_ids: t.Sequence[str]) -> t.List[str]:
+    """Return a table row of a given audio file: its path, then a cell per frame ID.
+
+    Only frames of given IDs are decoded. Chapters are represented by their
+    number, pictures by their MIME types and sizes, text, URL and lyrics
+    frames by their values, and other frames as mutagen pretty-prints them.
+    """
+
+    tags = metadata.load_tags(audio, frame_ids=frozenset(frame_ids))
+
+    frames = {frame_id: [] for frame_id in frame_ids}
+    for frame in tags.values() if tags is not None else []:
+        frames[frame.FrameID].append(frame)
+
+    return [audio] + [_format_cell(frames[frame_id]) for frame_id in frame_ids]
+
+
+def _format_cell(frames: t.List[id3.Frame]) -> str:
+    if not frames:
+        return ""
+    elif isinstance(frames[0], id3.CHAP):
+        return str(len(frames))
+
+    values = []
+    for frame in frames:
+        if isinstance(frame, id3.TextFrame):
+            values.extend(str(text) for text in frame.text)
+        elif isinstance(frame, id3.UrlFrame):
+            values.append(frame.url)
+        elif isinstance(frame, id3.USLT):
+            values.append(frame.text)
+        elif isinstance(frame, id3.APIC):
+            values.append(f"{frame.mime} ({len(frame.data)} bytes)")
+        else:
+            # No frame should cost the whole row, hence whatever mutagen
+            # shows for it, sans the frame ID prefix.
+            values.append(frame.pprint().partition("=")[2])
+    return VALUE_SEPARATOR.join(values)
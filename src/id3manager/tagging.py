@@ -0,0 +1,202 @@
+import io
+import os
+import typing as t
+
+import mutagen
+import mutagen.id3 as id3
+
+from . import duration, metadata, pictures, profiling
+
+__all__ = [
+    "get_metadata",
+    "dump_metadata",
+    "set_metadata",
+    "set_metadata_from_document",
+    "set_metadata_from_string",
+    "pad_tags",
+]
+
+
+def get_metadata(
+    audio: str,
+    format: str,
+    pictures_dir: t.Optional[str] = None,
+    frame_ids: t.Optional[t.AbstractSet[str]] = None,
+) -> str:
+    """Return serialized metadata of a given audio file."""
+
+    output = io.StringIO()
+    dump_metadata(audio, format, output, pictures_dir=pictures_dir, frame_ids=frame_ids)
+    return output.getvalue()
+
+
+def dump_metadata(
+    audio: str,
+    format: str,
+    fileobj: t.IO,
+    pictures_dir: t.Optional[str] = None,
+    frame_ids: t.Optional[t.AbstractSet[str]] = None,
+) -> None:
+    """Write serialized metadata of a given audio file into a stream.
+
+    If a pictures directory is given, embedded pictures are extracted there
+    and referred to by their "file://" URLs. If frame IDs are given, only
+    frames of these IDs are decoded and written.
+    """
+
+    with profiling.phase("load_tags"):
+        tags = metadata.load_tags(audio, frame_ids=frame_ids)
+    if tags is None:
+        return
+
+    frames = tags.values()
+    if pictures_dir is not None:
+        frames = map(pictures.get_picture_store(pictures_dir).externalize, frames)
+
+    with profiling.phase("write_metadata"):
+        metadata.write_metadata(fileobj, format, frames)
+
+
+def set_metadata(
+    audio: str,
+    fileobj: t.IO,
+    format: str,
+    padding: t.Optional[metadata.PaddingPolicy] = None,
+    duration_mode: str = "exact",
+    tags: t.Optional[metadata.ID3SourceFrameOrder] = None,
+    merge: bool = False,
+) -> bool:
+    """Replace metadata of a given audio file with a serialized one.
+
+    Return whether the file has been written to. It's not if the new tag is
+    identical to the existing one, so the file's mtime is retained and it's
+    not seen as changed by backup and sync tools.
+
+    Tags that have already been loaded from the audio file could be passed,
+    so that they are not loaded again. In the merge mode, only frames of IDs
+    present in the serialized metadata are replaced, and the rest are kept.
+    """
+
+    if padding is None:
+        padding = metadata.PaddingPolicy()
+
+    if tags is None:
+        with profiling.phase("load_tags"):
+            tags = metadata.load_tags(audio)
+
+    # Scanning the audio stream is the slowest part of the whole thing, while
+    # its duration is needed for chapters only.
+    audio_len = None
+
+    def get_audio_len():
+        nonlocal audio_len
+        if audio_len is None:
+            with profiling.phase("duration"):
+                audio_len = duration.get_duration(audio, duration_mode)
+        return audio_len
+
+    with profiling.phase("read_metadata"):
+        frames = metadata.read_metadata(fileobj, format, audio_len=get_audio_len)
+
+    if tags is None:
+        tags = metadata.ID3SourceFrameOrder()
+        old_data = None
+    elif tags.is_pristine():
+        with profiling.phase("serialize"):
+            old_data = tags.serialize()
+    else:
+        old_data = None
+
+    if merge:
+        frames = metadata.merge_frames(list(tags.values()), frames)
+
+    # The tag is cleared in memory only. Deleting it from the file would
+    # shift the whole audio stream, only to shift it back on save.
+    tags.clear()
+
+    for frame in frames:
+        tags.add(frame)
+
+    with profiling.phase("serialize"):
+        if old_data is not None and old_data == tags.serialize():
+            return False
+
+    with profiling.phase("save"):
+        tags.save(audio, v1=id3.ID3v1SaveOptions.REMOVE, padding=padding)
+        if audio_len is not None:
+            duration.remember_duration(audio, audio_len, duration_mode)
+    return True
+
+
+def set_metadata_from_document(
+    item: t.Tuple[str, str],
+    format: str,
+    padding: t.Optional[metadata.PaddingPolicy] = None,
+    duration_mode: str = "exact",
+    merge: bool = False,
+) -> bool:
+    """Replace metadata of an audio file with the one stored in a document."""
+
+    audio, document = item
+    with open(document, encoding="utf-8") as fileobj:
+        return set_metadata(
+            audio,
+            fileobj,
+            format,
+            padding=padding,
+            duration_mode=duration_mode,
+            merge=merge,
+        )
+
+
+def set_metadata_from_string(
+    item: t.Tuple[str, str],
+    format: str,
+    padding: t.Optional[metadata.PaddingPolicy] = None,
+    duration_mode: str = "exact",
+    merge: bool = False,
+) -> bool:
+    """Replace metadata of an audio file with a serialized one given as a string."""
+
+    audio, document = item
+    return set_metadata(
+        audio,
+        io.StringIO(document),
+        format,
+        padding=padding,
+        duration_mode=duration_mode,
+        merge=merge,
+    )
+
+
+def pad_tags(audio: str, padding: metadata.PaddingPolicy) -> bool:
+    """Reserve padding in the tag of a given audio file for future edits.
+
+    Return whether the file has been written to. It's not if the tag already
+    has as much padding as the policy asks for. Otherwise, the tag is saved
+    with more padding in its own version, i.e. ID3v2.3 tags are not upgraded.
+    """
+
+    tags = metadata.load_tags(audio)
+    if tags is None:
+        tags = metadata.ID3SourceFrameOrder()
+        v2_version = 4
+    else:
+        # ID3v2.2 tags can't be written, hence they are upgraded anyway.
+        v2_version = 3 if tags.version[1] == 3 else 4
+        if v2_version == 3:
+            tags.update_to_v23()
+
+        info = mutagen.PaddingInfo(
+            tags.size - 10 - len(tags.serialize(v2_version)),
+            os.path.getsize(audio) - tags.size,
+        )
+        if info.padding >= padding.amount(info):
+            return False
+
+    tags.save(
+        audio,
+        v2_version=v2_version,
+        padding=lambda info: max(info.padding, padding.amount(info)),
+    )
+    return True
@@ -1,10 +1,12 @@
-import base64
-import mimetypes
+import binascii
+import os
 import typing as t
 import urllib.parse as urlparse
 
 import mutagen.id3 as id3
 
+from . import pictures, profiling
+
 
 def parse_timestamp_to_ms(timestamp: str, sep: str = ":") -> int:
     parts = [float(part) for part in timestamp.split(sep)]
@@ -33,6 +35,70 @@ def sec_to_ms(sec: float):
     return int(sec * 1000)
 
 
+# Pictures are base64 encoded and decoded in blocks of this many bytes, so
+# that only a block's worth of base64 is in memory at a time. It's a multiple
+# of 3, so that blocks are encoded without padding.
+BASE64_BLOCK_SIZE = 48 * 1024
+
+_NON_BASE64 = bytes(
+    set(range(256))
+    - set(b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/=")
+)
+
+
+def write_base64(fileobj: t.IO, data: bytes) -> None:
+    """Write base64 of given data into a text stream, block by block."""
+
+    view = memoryview(data)
+    for start in range(0, len(view), BASE64_BLOCK_SIZE):
+        block = view[start : start + BASE64_BLOCK_SIZE]
+        fileobj.write(binascii.b2a_base64(block, newline=False).decode("ascii"))
+
+
+class Base64Decoder:
+    """Decoder of base64 data coming in chunks of any size.
+
+    Like `base64.b64decode`, it discards characters outside of the base64
+    alphabet, e.g. line breaks.
+    """
+
+    def __init__(self):
+        self._data = bytearray()
+        self._tail = b""
+
+    def feed(self, chunk: str) -> None:
+        # Characters are discarded before decoding, so that the chunk could
+        # be split at a boundary of 4-character groups.
+        chunk = self._tail + chunk.encode("ascii", "ignore").translate(
+            None, _NON_BASE64
+        )
+        end = len(chunk) - len(chunk) % 4
+        self._data += binascii.a2b_base64(chunk[:end])
+        self._tail = chunk[end:]
+
+    def finish(self) -> bytes:
+        if self._tail:
+            # Raises the same error as decoding all at once would.
+            binascii.a2b_base64(self._tail)
+        return bytes(self._data)
+
+
+def decode_base64(data: str) -> bytes:
+    """Decode a base64 string without making its ASCII-encoded copy."""
+
+    decoder = Base64Decoder()
+    for start in range(0, len(data), BASE64_BLOCK_SIZE):
+        decoder.feed(data[start : start + BASE64_BLOCK_SIZE])
+    return decoder.finish()
+
+
+def get_cache_dir() -> str:
+    """Return the directory to store persistent caches in."""
+
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_home, "id3manager")
+
+
 def get_apic_picture_type(value: t.Union[str, int, None] = None) -> id3.PictureType:
     # id3.PictureType is not an enum from the standard library :(
     FIRST = 0x00
@@ -58,7 +124,7 @@ def get_apic_picture_type(value: t.Union[str, int, None] = None) -> id3.PictureT
 
 
 def create_apic_frame(
-    data: t.Optional[str] = None,
+    data: t.Union[str, bytes, None] = None,
     url: t.Optional[urlparse.ParseResult] = None,
     mime_type: t.Optional[str] = None,
     picture_type: t.Optional[id3.PictureType] = None,
@@ -69,10 +135,15 @@ def create_apic_frame(
         mime_type = ""
 
     if data and not url:
-        try:
-            raw_data = base64.b64decode(data)
-        except Exception:
-            raise ValueError(f"Invalid base64 value: `{data}`")
+        # Data is either base64 encoded, or has been decoded while being read.
+        if isinstance(data, bytes):
+            raw_data = data
+        else:
+            try:
+                with profiling.phase("apic_decode"):
+                    raw_data = decode_base64(data)
+            except Exception:
+                raise ValueError(f"Invalid base64 value: `{data}`")
 
         return id3.APIC(data=raw_data, type=picture_type, mime=mime_type)
     elif url and not data:
@@ -82,11 +153,15 @@ def create_apic_frame(
             # the file extension.
             #
             # E.g. "file:///path/to/image.jpeg"
-            if not mime_type:
-                mime_type, _ = mimetypes.guess_type(url.path)
+            with profiling.phase("apic_load"):
+                data, guessed_mime_type = pictures.artwork_cache.load(
+                    urlparse.unquote(url.path)
+                )
+            if not mime_type or mime_type == "-->":
+                mime_type = guessed_mime_type
 
             return id3.APIC(
-                data=open(url.path, "rb").read(),
+                data=data,
                 type=picture_type,
                 mime=mime_type,
             )
@@ -0,0 +1,219 @@
+import os
+import select
+import struct
+import time
+import typing as t
+
+from . import batch
+
+__all__ = [
+    "InotifyWatcher",
+    "PollingWatcher",
+    "get_watcher",
+    "iter_changes",
+    "find_audio",
+]
+
+# How often the polling watcher scans the directory, in seconds.
+POLL_INTERVAL = 1.0
+
+# Constants of <sys/inotify.h>.
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_IN_EVENT = struct.Struct("iIII")
+
+
+class InotifyWatcher:
+    """Watch a directory tree for written files with Linux inotify.
+
+    Files are reported when they are closed after writing, or moved into the
+    tree, which is how many editors save files. Subdirectories created while
+    watching are watched too, and files found in them are reported.
+    """
+
+    name = "inotify"
+
+    def __init__(self, directory: str):
+        # Imported here, since the polling watcher is used where inotify is
+        # not available.
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._get_errno = ctypes.get_errno
+        self._fd = self._libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self._fd < 0:
+            raise self._error(directory)
+
+        self._directories = {}
+        self._add_tree(directory)
+        self._directory = directory
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+    def wait(self, timeout: t.Optional[float]) -> t.List[str]:
+        """Return files written within a given timeout, or until any is."""
+
+        if not select.select([self._fd], [], [], timeout)[0]:
+            return []
+
+        changed = []
+        data = os.read(self._fd, 64 * 1024)
+        for wd, mask, name in self._iter_events(data):
+            if mask & _IN_Q_OVERFLOW:
+                # Events have been lost, hence everything is reported.
+                changed.extend(_iter_files(self._directory))
+                continue
+
+            if mask & _IN_IGNORED:
+                self._directories.pop(wd, None)
+                continue
+
+            if wd not in self._directories:
+                continue
+
+            path = os.path.join(self._directories[wd], name)
+            if mask & _IN_ISDIR:
+                self._add_tree(path)
+                changed.extend(_iter_files(path))
+            else:
+                changed.append(path)
+        return changed
+
+    def _iter_events(self, data: bytes) -> t.Iterator[t.Tuple[int, int, str]]:
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, size = _IN_EVENT.unpack_from(data, offset)
+            name = data[offset + _IN_EVENT.size : offset + _IN_EVENT.size + size]
+            yield wd, mask, os.fsdecode(name.rstrip(b"\0"))
+            offset += _IN_EVENT.size + size
+
+    def _add_tree(self, directory: str) -> None:
+        mask = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE
+        for root, _, _ in os.walk(directory):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(root), mask)
+            if wd < 0:
+                raise self._error(root)
+            self._directories[wd] = root
+
+    def _error(self, path: str) -> OSError:
+        errno = self._get_errno()
+        return OSError(errno, os.strerror(errno), path)
+
+
+class PollingWatcher:
+    """Watch a directory tree for written files by scanning it periodically.
+
+    Files are reported when their size or mtime change. It works everywhere,
+    including network file systems where inotify does not see changes made
+    by other machines.
+    """
+
+    name = "polling"
+
+    def __init__(self, directory: str, interval: float = POLL_INTERVAL):
+        self._directory = directory
+        self._interval = interval
+        self._snapshot = self._scan()
+
+    def close(self) -> None:
+        pass
+
+    def wait(self, timeout: t.Optional[float]) -> t.List[str]:
+        """Return files written within a given timeout, or until any is."""
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = self._interval
+            if deadline is not None:
+                remaining = min(remaining, deadline - time.monotonic())
+            time.sleep(max(remaining, 0))
+
+            snapshot = self._scan()
+            changed = [
+                path
+                for path, stamp in snapshot.items()
+                if self._snapshot.get(path) != stamp
+            ]
+            self._snapshot = snapshot
+
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def _scan(self) -> t.Dict[str, t.Tuple[int, int]]:
+        snapshot = {}
+        for path in _iter_files(self._directory):
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (st.st_size, st.st_mtime_ns)
+        return snapshot
+
+
+Watcher = t.Union[InotifyWatcher, PollingWatcher]
+
+
+def get_watcher(directory: str, poll: bool = False) -> Watcher:
+    """Return an inotify watcher, or a polling one if inotify is not available."""
+
+    if not poll:
+        try:
+            return InotifyWatcher(directory)
+        except (OSError, AttributeError, TypeError):
+            # Either not Linux, or the limit of inotify instances or watches
+            # has been reached.
+            pass
+    return PollingWatcher(directory)
+
+
+def iter_changes(
+    watcher: Watcher,
+    extension: str,
+    debounce: float = 0.5,
+) -> t.Iterator[t.List[str]]:
+    """Yield lists of changed files with a given extension, as they settle.
+
+    A file is yielded once it hasn't been written to for a debounce period,
+    so that a burst of writes, e.g. an editor saving a file in a few steps or
+    a checkout of many files, results in a single apply per file.
+    """
+
+    pending = {}
+    while True:
+        timeout = None
+        if pending:
+            timeout = max(min(pending.values()) - time.monotonic(), 0)
+
+        for path in watcher.wait(timeout):
+            if os.path.splitext(path)[1] == extension:
+                pending[path] = time.monotonic() + debounce
+
+        now = time.monotonic()
+        settled = sorted(path for path, deadline in pending.items() if deadline <= now)
+        for path in settled:
+            del pending[path]
+        if settled:
+            yield settled
+
+
+def find_audio(sidecar: str) -> t.Optional[str]:
+    """Return the audio file a given sidecar document belongs to, if any."""
+
+    stem = os.path.splitext(sidecar)[0]
+    for extension in sorted(batch.AUDIO_EXTENSIONS):
+        if os.path.isfile(stem + extension):
+            return stem + extension
+    return None
+
+
+def _iter_files(directory: str) -> t.Iterator[str]:
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            yield os.path.join(root, name)
@@ -1,6 +1,7 @@
 import os
 import pathlib
 import shutil
+import tempfile
 import uuid
 
 import pytest
@@ -20,3 +21,22 @@ def get_mp3(testdata, tmpdir):
         return destination
 
     return inner
+
+
+@pytest.fixture(scope="function", autouse=True)
+def cache_home(monkeypatch, tmpdir):
+    cache_home = pathlib.Path(tmpdir.strpath) / ".cache"
+    monkeypatch.setenv("XDG_CACHE_HOME", str(cache_home))
+    return cache_home
+
+
+@pytest.fixture(scope="function", autouse=True)
+def daemon_socket(monkeypatch):
+    # Isolate tests from a daemon that might be running on the machine. The
+    # socket is not kept in tmpdir, since paths of UNIX sockets are limited
+    # to about a hundred bytes, which tmpdir exceeds on macOS.
+    socket_dir = tempfile.mkdtemp(dir="/tmp")
+    daemon_socket = pathlib.Path(socket_dir) / "id3manager.sock"
+    monkeypatch.setenv("ID3MANAGER_SOCKET", str(daemon_socket))
+    yield daemon_socket
+    shutil.rmtree(socket_dir)
@@ -0,0 +1,62 @@
+import subprocess
+
+import mutagen.mp3 as mp3
+import pytest
+from id3manager import duration
+
+
+@pytest.mark.parametrize("mode", ["exact", "estimate"])
+def test_scan_duration(testdata, mode):
+    test_mp3 = testdata / "metadata.mp3"
+
+    assert mp3.MP3(test_mp3).info.length == duration.scan_duration(test_mp3, mode)
+
+
+def test_scan_duration_no_audio(tmpdir):
+    test_mp3 = tmpdir / "junk.mp3"
+    test_mp3.write_binary(b"ID3\x04\x00\x00\x00\x00\x00\x00" + b"junk" * 1000)
+
+    with pytest.raises(ValueError):
+        duration.scan_duration(test_mp3)
+
+
+def test_get_duration_cached(get_mp3, monkeypatch):
+    test_mp3 = get_mp3("metadata.mp3")
+    expected = duration.get_duration(test_mp3)
+
+    def scan_duration(path, mode):
+        raise AssertionError("audio stream must not be rescanned")
+
+    monkeypatch.setattr(duration, "scan_duration", scan_duration)
+    assert expected == duration.get_duration(test_mp3)
+
+    # Tags are rewritten in-place, hence the file's mtime changes.
+    subprocess.check_output(
+        ["id3manager", "set", test_mp3],
+        input="TIT2 = Обробка помилок\n\n00:00:00 Початок\n".encode("utf-8"),
+    )
+    assert expected == duration.get_duration(test_mp3)
+
+
+def test_scan_duration_vbr_without_xing(tmpdir):
+    # MPEG-1 Layer III frames at 44.1kHz, alternating 128kbps and 64kbps.
+    frames = [b"\xff\xfb\x90\x00" + b"\x00" * 413, b"\xff\xfb\x50\x00" + b"\x00" * 204]
+    test_mp3 = tmpdir / "vbr.mp3"
+    test_mp3.write_binary(b"".join(frames * 50))
+
+    assert 100 * 1152 / 44100 == duration.scan_duration(test_mp3, "exact")
+    assert 100 * 1152 / 44100 != duration.scan_duration(test_mp3, "estimate")
+
+
+@pytest.mark.parametrize("mode", ["exact", "estimate"])
+def test_scan_duration_xing(tmpdir, mode):
+    # The frame count of a Xing header is trusted, and frames are not scanned.
+    xing = b"Xing" + (1).to_bytes(4, "big") + (1000).to_bytes(4, "big")
+    frames = [
+        b"\xff\xfb\x90\x00" + b"\x00" * 32 + xing + b"\x00" * 369,
+        b"\xff\xfb\x90\x00" + b"\x00" * 413,
+    ]
+    test_mp3 = tmpdir / "xing.mp3"
+    test_mp3.write_binary(b"".join(frames))
+
+    assert 1000 * 1152 / 44100 == duration.scan_duration(test_mp3, mode)
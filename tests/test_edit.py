@@ -1,4 +1,6 @@
+import os
 import subprocess
+import sys
 import textwrap
 
 import pytest
@@ -188,3 +190,75 @@ def test_toml_no_metadata(get_mp3):
 
     actual = subprocess.check_output(["id3manager", "-f", "toml", "get", test_mp3])
     assert expected == actual.decode("utf-8")
+
+
+def test_unchanged(get_mp3, monkeypatch):
+    monkeypatch.setenv("EDITOR", "true")
+    test_mp3 = get_mp3("metadata.mp3")
+    os.utime(test_mp3, ns=(0, 0))
+    expected = test_mp3.read_bytes()
+
+    subprocess.check_output(["id3manager", "edit", test_mp3])
+
+    assert expected == test_mp3.read_bytes()
+    assert 0 == test_mp3.stat().st_mtime_ns
+
+
+def test_multiple_files(get_mp3, tmpdir, monkeypatch):
+    editor = tmpdir / "editor.py"
+    editor.write_text(
+        textwrap.dedent(
+            f"""\
+            #!{sys.executable}
+            import sys
+
+            with open(sys.argv[1], encoding="utf-8") as fp:
+                buffer = fp.read()
+            with open(sys.argv[1], "w", encoding="utf-8") as fp:
+                fp.write(buffer.replace("TIT2 = Обробка", "TIT2 = Створення", 1))
+            """
+        ),
+        encoding="utf-8",
+    )
+    editor.chmod(0o755)
+    monkeypatch.setenv("EDITOR", str(editor))
+
+    test_mp3_a, test_mp3_b = sorted([get_mp3("metadata.mp3"), get_mp3("metadata.mp3")])
+    test_mp3_c = get_mp3("no-metadata.mp3")
+    os.utime(test_mp3_b, ns=(0, 0))
+
+    actual = subprocess.check_output(
+        ["id3manager", "edit", "-j", "2", test_mp3_a, test_mp3_b, test_mp3_c]
+    )
+    assert f"{test_mp3_a}: updated\n" == actual.decode("utf-8")
+
+    actual = subprocess.check_output(["id3manager", "get", test_mp3_a, test_mp3_b])
+    assert (
+        textwrap.dedent(
+            f"""\
+        ==> {test_mp3_a} <==
+        TIT2 = Створення помилок
+        TPE1 = Ігор, Роман
+        TRCK = 14/14
+        TALB = Шо по коду?
+        TDRC = 2022-11-27
+        TCON = Podcast
+        TSSE = Lavf59.27.100
+
+        00:00:00 Початок
+
+        ==> {test_mp3_b} <==
+        TIT2 = Обробка помилок
+        TPE1 = Ігор, Роман
+        TRCK = 14/14
+        TALB = Шо по коду?
+        TDRC = 2022-11-27
+        TCON = Podcast
+        TSSE = Lavf59.27.100
+
+        00:00:00 Початок
+        """
+        )
+        == actual.decode("utf-8")
+    )
+    assert 0 == test_mp3_b.stat().st_mtime_ns
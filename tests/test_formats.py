@@ -0,0 +1,77 @@
+import os
+import pathlib
+import subprocess
+import sys
+import textwrap
+
+
+def test_format_lazy_import(get_mp3):
+    test_mp3 = get_mp3("metadata.mp3")
+    script = textwrap.dedent(
+        f"""\
+        import sys
+        from id3manager.__main__ import main
+
+        main(["get", {str(test_mp3)!r}])
+        print("tomlkit" in sys.modules)
+        """
+    )
+
+    actual = subprocess.check_output([sys.executable, "-c", script])
+    assert actual.decode("utf-8").endswith("\nFalse\n")
+
+
+def test_format_plugin(get_mp3, tmpdir):
+    test_mp3 = get_mp3("metadata.mp3")
+
+    site = pathlib.Path(tmpdir.strpath) / "site"
+    dist_info = site / "id3manager_upper-1.0.dist-info"
+    dist_info.mkdir(parents=True)
+    (dist_info / "METADATA").write_text(
+        "Metadata-Version: 2.1\nName: id3manager-upper\nVersion: 1.0\n",
+        encoding="utf-8",
+    )
+    (dist_info / "entry_points.txt").write_text(
+        "[id3manager.formatters]\nupper = id3manager_upper:UpperMetadataFormatter\n",
+        encoding="utf-8",
+    )
+    (site / "id3manager_upper.py").write_text(
+        textwrap.dedent(
+            """\
+            from id3manager.formats.abc import MetadataFormatter
+
+
+            class UpperMetadataFormatter(MetadataFormatter):
+                name = "upper"
+
+                def read(self, fileobj):
+                    raise NotImplementedError
+
+                def write(self, fileobj, frames):
+                    for frame in frames:
+                        if frame.FrameID.startswith("T"):
+                            fileobj.write(f"{frame.FrameID} = {str(frame.text[0]).upper()}\\n")
+            """
+        ),
+        encoding="utf-8",
+    )
+
+    env = dict(os.environ, PYTHONPATH=str(site))
+    actual = subprocess.check_output(
+        ["id3manager", "-f", "upper", "get", test_mp3], env=env
+    )
+    assert actual.decode("utf-8").startswith(
+        "TIT2 = ОБРОБКА ПОМИЛОК\nTPE1 = ІГОР, РОМАН\n"
+    )
+
+
+def test_format_unsupported(get_mp3):
+    test_mp3 = get_mp3("metadata.mp3")
+
+    process = subprocess.run(
+        ["id3manager", "-f", "yaml", "get", test_mp3], capture_output=True
+    )
+    assert 2 == process.returncode
+    assert process.stderr.decode("utf-8").endswith(
+        "error: argument -f/--format: yaml: unsupported format\n"
+    )
@@ -1,6 +1,15 @@
+import base64
+import hashlib
+import json
+import os
+import stat
 import subprocess
+import sys
 import textwrap
 
+import mutagen.id3 as id3
+import pytest
+
 
 def test_text_metadata(get_mp3):
     test_mp3 = get_mp3("metadata.mp3")
@@ -71,3 +80,312 @@ def test_toml_no_metadata(get_mp3):
     actual = subprocess.check_output(["id3manager", "-f", "toml", "get", test_mp3])
 
     assert expected == actual.decode("utf-8")
+
+
+def test_jsonl_metadata(get_mp3):
+    test_mp3 = get_mp3("metadata.mp3")
+    expected = textwrap.dedent(
+        """\
+        {"id":"TIT2","text":["Обробка помилок"],"encoding":3}
+        {"id":"TPE1","text":["Ігор, Роман"],"encoding":3}
+        {"id":"TRCK","text":["14/14"],"encoding":3}
+        {"id":"TALB","text":["Шо по коду?"],"encoding":3}
+        {"id":"TDRC","text":["2022-11-27"],"encoding":3}
+        {"id":"TCON","text":["Podcast"],"encoding":3}
+        {"id":"TSSE","text":["Lavf59.27.100"],"encoding":3}
+        {"id":"CTOC","element_id":"toc","flags":3,"child_element_ids":["ch0"],"sub_frames":[]}
+        {"id":"CHAP","element_id":"ch0","start_time":0,"end_time":5000,"sub_frames":[{"id":"TIT2","text":["Початок"],"encoding":3}]}
+        """  # noqa: E501
+    )
+    actual = subprocess.check_output(["id3manager", "-f", "jsonl", "get", test_mp3])
+
+    assert expected == actual.decode("utf-8")
+
+
+def test_text_frames(get_mp3):
+    test_mp3 = get_mp3("metadata.mp3")
+    expected = textwrap.dedent(
+        """\
+        TALB = Шо по коду?
+        TDRC = 2022-11-27
+
+        00:00:00 Початок
+        """
+    )
+    actual = subprocess.check_output(
+        ["id3manager", "get", "--frames", "TDRC,CHAP,TALB", test_mp3]
+    )
+
+    assert expected == actual.decode("utf-8")
+
+
+def test_jsonl_frames(get_mp3):
+    test_mp3 = get_mp3("metadata.mp3")
+    expected = textwrap.dedent(
+        """\
+        {"id":"TIT2","text":["Обробка помилок"],"encoding":3}
+        {"id":"CTOC","element_id":"toc","flags":3,"child_element_ids":["ch0"],"sub_frames":[]}
+        """  # noqa: E501
+    )
+    actual = subprocess.check_output(
+        ["id3manager", "-f", "jsonl", "get", "--frames", "TIT2,CTOC", test_mp3]
+    )
+
+    assert expected == actual.decode("utf-8")
+
+
+def test_text_frames_invalid(get_mp3):
+    test_mp3 = get_mp3("metadata.mp3")
+    process = subprocess.run(
+        ["id3manager", "get", "--frames", "TIT2,title", test_mp3],
+        capture_output=True,
+        encoding="utf-8",
+    )
+
+    assert process.returncode == 2
+    assert "title: invalid frame ID" in process.stderr
+
+
+def test_text_multiple_files(get_mp3):
+    test_mp3_a = get_mp3("metadata.mp3")
+    test_mp3_b = get_mp3("no-metadata.mp3")
+    expected = textwrap.dedent(
+        f"""\
+        ==> {test_mp3_a} <==
+        TIT2 = Обробка помилок
+        TPE1 = Ігор, Роман
+        TRCK = 14/14
+        TALB = Шо по коду?
+        TDRC = 2022-11-27
+        TCON = Podcast
+        TSSE = Lavf59.27.100
+
+        00:00:00 Початок
+
+        ==> {test_mp3_b} <==
+        """
+    )
+    actual = subprocess.check_output(["id3manager", "get", test_mp3_a, test_mp3_b])
+
+    assert expected == actual.decode("utf-8")
+
+
+def test_text_directory_jobs(get_mp3, tmpdir):
+    test_mp3s = sorted(str(get_mp3("metadata.mp3")) for _ in range(5))
+    expected = "\n".join(
+        f"==> {test_mp3} <==\n"
+        + subprocess.check_output(["id3manager", "get", test_mp3]).decode("utf-8")
+        for test_mp3 in test_mp3s
+    )
+    actual = subprocess.check_output(["id3manager", "get", "--jobs", "2", tmpdir])
+
+    assert expected == actual.decode("utf-8")
+
+
+@pytest.mark.parametrize(
+    "command",
+    [
+        pytest.param(["id3manager"], id="script"),
+        pytest.param([sys.executable, "-m", "id3manager"], id="module"),
+    ],
+)
+def test_text_missing_file(get_mp3, tmpdir, command):
+    test_mp3 = get_mp3("metadata.mp3")
+    missing_mp3 = tmpdir / "missing.mp3"
+    completed = subprocess.run(
+        [*command, "get", missing_mp3, test_mp3], capture_output=True
+    )
+
+    assert completed.returncode == 1
+    assert str(missing_mp3) in completed.stderr.decode("utf-8")
+    assert f"==> {test_mp3} <==" in completed.stdout.decode("utf-8")
+
+
+def test_text_tag_only(get_mp3):
+    # Strip the audio stream: tags must be read without analyzing it.
+    test_mp3 = get_mp3("metadata.mp3")
+    data = test_mp3.read_bytes()
+    size = 10 + sum(byte << (7 * (3 - idx)) for idx, byte in enumerate(data[6:10]))
+    test_mp3.write_bytes(data[:size])
+
+    expected = subprocess.check_output(["id3manager", "get", get_mp3("metadata.mp3")])
+    actual = subprocess.check_output(["id3manager", "get", test_mp3])
+
+    assert expected == actual
+
+
+def test_text_extract_pictures(get_mp3, testdata, tmpdir):
+    image_path = testdata / "logo.png"
+    image_hash = hashlib.sha256(image_path.read_bytes()).hexdigest()
+    pictures_dir = tmpdir / "pictures"
+
+    test_mp3s = [get_mp3("metadata.mp3"), get_mp3("metadata.mp3")]
+    for test_mp3 in test_mp3s:
+        subprocess.check_output(
+            ["id3manager", "set", test_mp3],
+            input=f"TIT2 = Обробка помилок\nAPIC = file://{image_path}\n".encode(
+                "utf-8"
+            ),
+        )
+
+    expected = textwrap.dedent(
+        f"""\
+        TIT2 = Обробка помилок
+        APIC = file://{pictures_dir / image_hash}.png COVER_FRONT
+        """
+    )
+    actual = subprocess.check_output(
+        ["id3manager", "get", "--extract-pictures", pictures_dir, *test_mp3s]
+    )
+
+    assert actual.decode("utf-8").count(expected) == 2
+    assert [f"{image_hash}.png"] == os.listdir(pictures_dir)
+    assert image_path.read_bytes() == (pictures_dir / f"{image_hash}.png").read_binary()
+
+    # Pictures are created as regular files are, not private to the owner.
+    umask = os.umask(0)
+    os.umask(umask)
+    mode = os.stat(pictures_dir / f"{image_hash}.png").st_mode
+    assert 0o666 & ~umask == stat.S_IMODE(mode)
+
+
+def test_toml_extract_pictures_round_trip(get_mp3, testdata, tmpdir):
+    test_mp3 = get_mp3("metadata.mp3")
+    subprocess.check_output(
+        ["id3manager", "set", test_mp3],
+        input=f"APIC = file://{testdata / 'logo.png'}\n".encode("utf-8"),
+    )
+    expected = subprocess.check_output(["id3manager", "-f", "toml", "get", test_mp3])
+
+    metadata = subprocess.check_output(
+        ["id3manager", "-f", "toml", "get", "--extract-pictures", tmpdir, test_mp3]
+    )
+    subprocess.check_output(
+        ["id3manager", "-f", "toml", "set", test_mp3], input=metadata
+    )
+
+    actual = subprocess.check_output(["id3manager", "-f", "toml", "get", test_mp3])
+    assert expected == actual
+
+
+def test_jsonl_extract_pictures_round_trip(get_mp3, testdata, tmpdir):
+    test_mp3 = get_mp3("metadata.mp3")
+    picture = {
+        "id": "APIC",
+        "mime": "image/png",
+        "type": 4,
+        "desc": "back",
+        "data": base64.b64encode((testdata / "logo.png").read_bytes()).decode(),
+    }
+    subprocess.check_output(
+        ["id3manager", "-f", "jsonl", "set", test_mp3],
+        input=json.dumps(picture).encode("utf-8"),
+    )
+    expected = subprocess.check_output(["id3manager", "-f", "jsonl", "get", test_mp3])
+
+    metadata = subprocess.check_output(
+        ["id3manager", "-f", "jsonl", "get", "--extract-pictures", tmpdir, test_mp3]
+    )
+    assert b'"url":"file://' in metadata
+    subprocess.check_output(
+        ["id3manager", "-f", "jsonl", "set", test_mp3], input=metadata
+    )
+
+    actual = subprocess.check_output(["id3manager", "-f", "jsonl", "get", test_mp3])
+    assert expected == actual
+
+
+def test_table_csv(get_mp3, tmpdir):
+    test_mp3_a = get_mp3("metadata.mp3")
+    test_mp3_b = get_mp3("no-metadata.mp3")
+
+    # A multi-value text frame with a quote is set to check quoting.
+    document = '{"id":"TPE1","text":["Ігор","Роман \\"Ромко\\""]}\n'
+    subprocess.check_output(
+        ["id3manager", "-f", "jsonl", "set", test_mp3_b], input=document.encode("utf-8")
+    )
+
+    actual = subprocess.check_output(["id3manager", "get", "--table", "csv", tmpdir])
+    lines = actual.decode("utf-8").splitlines()
+
+    assert "path,TIT2,TPE1,TALB,TDRC,TRCK,TCON,CHAP" == lines[0]
+    assert sorted(lines[1:]) == sorted(
+        [
+            f'{test_mp3_a},Обробка помилок,"Ігор, Роман",Шо по коду?,2022-11-27,14/14,Podcast,1',
+            f'{test_mp3_b},,"Ігор; Роман ""Ромко""",,,,,',
+        ]
+    )
+
+
+def test_table_tsv_frames(get_mp3):
+    test_mp3 = get_mp3("metadata.mp3")
+    expected = textwrap.dedent(
+        f"""\
+        path\tCHAP\tTSSE\tAPIC
+        {test_mp3}\t1\tLavf59.27.100\t
+        """
+    )
+    actual = subprocess.check_output(
+        ["id3manager", "get", "--table", "tsv", "--frames", "CHAP,TSSE,APIC", test_mp3]
+    )
+
+    assert expected == actual.decode("utf-8")
+
+
+def test_table_other_frames(get_mp3):
+    test_mp3 = get_mp3("metadata.mp3")
+
+    tags = id3.ID3(test_mp3)
+    tags.add(id3.USLT(encoding=3, lang="ukr", desc="", text="Шо по коду?"))
+    tags.add(id3.PRIV(owner="shopokodu.com", data=b"\x00\x01"))
+    tags.save()
+
+    expected = textwrap.dedent(
+        f"""\
+        path,TIT2,USLT,PRIV
+        {test_mp3},Обробка помилок,Шо по коду?,shopokodu.com=b'\\x00\\x01'
+        """
+    )
+    actual = subprocess.check_output(
+        ["id3manager", "get", "--table", "csv", "--frames", "TIT2,USLT,PRIV", test_mp3]
+    )
+
+    assert expected == actual.decode("utf-8")
+
+
+@pytest.mark.parametrize(
+    ("args", "error"),
+    [
+        pytest.param(
+            ["-f", "toml", "get", "--table", "csv"],
+            "argument --table: not allowed with -f/--format",
+            id="format",
+        ),
+        pytest.param(
+            ["get", "--table", "csv", "--extract-pictures", "pictures"],
+            "argument --table: not allowed with --extract-pictures",
+            id="extract-pictures",
+        ),
+    ],
+)
+def test_table_not_allowed(get_mp3, args, error):
+    test_mp3 = get_mp3("metadata.mp3")
+
+    process = subprocess.run(["id3manager", *args, test_mp3], capture_output=True)
+
+    assert 2 == process.returncode
+    assert error in process.stderr.decode("utf-8")
+
+
+@pytest.mark.parametrize("jobs", ["-1", "many"])
+def test_jobs_invalid(get_mp3, jobs):
+    test_mp3 = get_mp3("metadata.mp3")
+
+    process = subprocess.run(
+        ["id3manager", "get", "--jobs", jobs, test_mp3], capture_output=True
+    )
+
+    assert 2 == process.returncode
+    assert f"argument -j/--jobs: {jobs}: not a non-negative integer" in (
+        process.stderr.decode("utf-8")
+    )
@@ -0,0 +1,60 @@
+import sqlite3
+import subprocess
+
+
+def test_index(get_mp3, tmpdir):
+    database = tmpdir / "index.sqlite3"
+    test_mp3 = get_mp3("metadata.mp3")
+    get_mp3("no-metadata.mp3")
+
+    actual = subprocess.check_output(["id3manager", "index", "-d", database, tmpdir])
+    assert "2 indexed, 0 unchanged, 0 removed, 0 failed\n" == actual.decode("utf-8")
+
+    with sqlite3.connect(database) as connection:
+        frames = connection.execute(
+            "SELECT frame_id, value FROM frames JOIN files ON files.id = file_id"
+            " WHERE path = ? ORDER BY position",
+            (str(test_mp3),),
+        ).fetchall()
+    assert [
+        ("TIT2", "Обробка помилок"),
+        ("TPE1", "Ігор, Роман"),
+        ("TRCK", "14/14"),
+        ("TALB", "Шо по коду?"),
+        ("TDRC", "2022-11-27"),
+        ("TCON", "Podcast"),
+        ("TSSE", "Lavf59.27.100"),
+        ("CTOC", None),
+        ("CHAP", "Початок"),
+    ] == frames
+
+
+def test_index_incremental(get_mp3, tmpdir):
+    database = tmpdir / "index.sqlite3"
+    test_mp3_a = get_mp3("metadata.mp3")
+    test_mp3_b = get_mp3("metadata.mp3")
+    subprocess.check_output(["id3manager", "index", "-d", database, tmpdir])
+
+    actual = subprocess.check_output(["id3manager", "index", "-d", database, tmpdir])
+    assert "0 indexed, 2 unchanged, 0 removed, 0 failed\n" == actual.decode("utf-8")
+
+    subprocess.check_output(
+        ["id3manager", "set", test_mp3_a],
+        input="TIT2 = Обробка помилок\n\n00:00:00 Початок\n".encode("utf-8"),
+    )
+    test_mp3_b.unlink()
+
+    actual = subprocess.check_output(
+        ["id3manager", "index", "-j", "2", "-d", database, tmpdir]
+    )
+    assert "1 indexed, 0 unchanged, 1 removed, 0 failed\n" == actual.decode("utf-8")
+
+    with sqlite3.connect(database) as connection:
+        frames = connection.execute(
+            "SELECT path, frame_id FROM frames JOIN files ON files.id = file_id"
+        ).fetchall()
+    assert [
+        (str(test_mp3_a), "TIT2"),
+        (str(test_mp3_a), "CHAP"),
+        (str(test_mp3_a), "CTOC"),
+    ] == frames
@@ -0,0 +1,112 @@
+import os
+import subprocess
+import textwrap
+
+import mutagen.id3 as id3
+
+
+def _tag_size(test_mp3):
+    data = test_mp3.read_bytes()
+    return 10 + sum(byte << (7 * (3 - idx)) for idx, byte in enumerate(data[6:10]))
+
+
+def test_pad(get_mp3):
+    test_mp3 = get_mp3("metadata.mp3")
+    expected = subprocess.check_output(["id3manager", "get", test_mp3])
+    audio_size = test_mp3.stat().st_size - _tag_size(test_mp3)
+
+    subprocess.check_output(["id3manager", "pad", "--padding", "fixed:65536", test_mp3])
+
+    assert _tag_size(test_mp3) >= 65536
+    assert test_mp3.stat().st_size - _tag_size(test_mp3) == audio_size
+
+    actual = subprocess.check_output(["id3manager", "get", test_mp3])
+    assert expected == actual
+
+
+def test_pad_enough_padding(get_mp3):
+    test_mp3 = get_mp3("metadata.mp3")
+    subprocess.check_output(["id3manager", "pad", "--padding", "fixed:8192", test_mp3])
+    size = test_mp3.stat().st_size
+    os.utime(test_mp3, ns=(0, 0))
+
+    subprocess.check_output(["id3manager", "pad", "--padding", "fixed:4096", test_mp3])
+
+    assert test_mp3.stat().st_size == size
+    assert test_mp3.stat().st_mtime_ns == 0
+
+
+def test_pad_v23(get_mp3):
+    test_mp3 = get_mp3("metadata.mp3")
+    tags = id3.ID3(test_mp3, v2_version=3)
+    tags.save(v2_version=3)
+    expected = subprocess.check_output(["id3manager", "get", test_mp3])
+
+    subprocess.check_output(["id3manager", "pad", "--padding", "fixed:65536", test_mp3])
+
+    assert _tag_size(test_mp3) >= 65536
+    assert (2, 3, 0) == id3.ID3(test_mp3).version
+
+    actual = subprocess.check_output(["id3manager", "get", test_mp3])
+    assert expected == actual
+
+
+def test_pad_no_metadata(get_mp3):
+    test_mp3 = get_mp3("no-metadata.mp3")
+    size = test_mp3.stat().st_size
+
+    subprocess.check_output(["id3manager", "pad", "--padding", "fixed:4096", test_mp3])
+
+    assert test_mp3.stat().st_size == size + 10 + 4096
+    assert b"" == subprocess.check_output(["id3manager", "get", test_mp3])
+
+
+def test_set_in_place(get_mp3):
+    test_mp3 = get_mp3("metadata.mp3")
+    subprocess.check_output(["id3manager", "pad", test_mp3])
+    size = test_mp3.stat().st_size
+
+    expected = textwrap.dedent(
+        """\
+        TIT2 = Обробка помилок, частина друга
+        TPE1 = Ігор, Роман
+        TALB = Шо по коду?
+        TCON = Podcast
+
+        00:00:00 Початок
+        00:00:01 Кінець
+        """
+    )
+    subprocess.check_output(
+        ["id3manager", "set", test_mp3], input=expected.encode("utf-8")
+    )
+
+    assert test_mp3.stat().st_size == size
+
+    actual = subprocess.check_output(["id3manager", "get", test_mp3])
+    assert expected == actual.decode("utf-8")
+
+
+def test_set_padding_fixed(get_mp3):
+    test_mp3 = get_mp3("no-metadata.mp3")
+    size = test_mp3.stat().st_size
+
+    subprocess.check_output(
+        ["id3manager", "set", "--padding", "fixed:1000", test_mp3],
+        input="TIT2 = Обробка помилок\n\n00:00:00 Початок\n".encode("utf-8"),
+    )
+
+    tag_size = _tag_size(test_mp3)
+    assert test_mp3.stat().st_size == size + tag_size
+    assert test_mp3.read_bytes()[tag_size - 1000 : tag_size] == b"\x00" * 1000
+
+
+def test_set_padding_invalid(get_mp3):
+    test_mp3 = get_mp3("metadata.mp3")
+    completed = subprocess.run(
+        ["id3manager", "set", "--padding", "fixed:lots", test_mp3],
+        input="TIT2 = Обробка помилок\n".encode("utf-8"),
+        capture_output=True,
+    )
+
+    assert completed.returncode == 2
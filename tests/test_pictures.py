@@ -0,0 +1,68 @@
+from id3manager import pictures
+
+
+def test_artwork_cache(testdata):
+    cache = pictures.ArtworkCache()
+    image_path = testdata / "logo.png"
+
+    for _ in range(3):
+        data, mime_type = cache.load(str(image_path))
+
+        assert image_path.read_bytes() == data
+        assert "image/png" == mime_type
+
+    info = cache.info()
+    assert (2, 1) == (info.hits, info.misses)
+    assert (1, len(data)) == (info.currsize, info.currbytes)
+
+
+def test_artwork_cache_file_changed(tmpdir):
+    cache = pictures.ArtworkCache()
+    image_path = tmpdir / "cover.jpg"
+
+    image_path.write_binary(b"old")
+    assert (b"old", "image/jpeg") == cache.load(str(image_path))
+
+    image_path.write_binary(b"newer")
+    assert (b"newer", "image/jpeg") == cache.load(str(image_path))
+
+    info = cache.info()
+    assert (0, 2) == (info.hits, info.misses)
+    assert (1, 5) == (info.currsize, info.currbytes)
+
+
+def test_artwork_cache_eviction(tmpdir):
+    cache = pictures.ArtworkCache(maxsize=2, maxbytes=10)
+    image_paths = [str(tmpdir / f"{idx}.png") for idx in range(4)]
+    for idx, image_path in enumerate(image_paths):
+        with open(image_path, "wb") as fp:
+            fp.write(b"x" * (idx + 3))
+
+    cache.load(image_paths[0])
+    cache.load(image_paths[1])
+    cache.load(image_paths[0])
+    cache.load(image_paths[2])  # evicts the least recently used 1.png
+
+    info = cache.info()
+    assert (1, 3) == (info.hits, info.misses)
+    assert (2, 8) == (info.currsize, info.currbytes)
+
+    cache.load(image_paths[0])
+    cache.load(image_paths[3])  # evicts the least recently used 2.png
+
+    info = cache.info()
+    assert (2, 4) == (info.hits, info.misses)
+    assert (2, 9) == (info.currsize, info.currbytes)
+
+
+def test_artwork_cache_too_large(tmpdir):
+    cache = pictures.ArtworkCache(maxbytes=2)
+    image_path = tmpdir / "cover.png"
+    image_path.write_binary(b"xxx")
+
+    cache.load(str(image_path))
+    cache.load(str(image_path))
+
+    info = cache.info()
+    assert (0, 2) == (info.hits, info.misses)
+    assert (0, 0) == (info.currsize, info.currbytes)
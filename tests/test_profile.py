@@ -0,0 +1,50 @@
+import json
+import subprocess
+
+
+def test_profile_get(get_mp3):
+    test_mp3 = get_mp3("metadata.mp3")
+
+    process = subprocess.run(
+        ["id3manager", "--profile", "get", test_mp3], capture_output=True, check=True
+    )
+
+    phases = [line.split()[0] for line in process.stderr.decode("utf-8").splitlines()]
+    assert ["phase", "load_tags", "write_metadata", "total"] == phases
+
+
+def test_profile_set_output(get_mp3, testdata, tmpdir):
+    test_mp3 = get_mp3("metadata.mp3")
+    report_path = tmpdir / "profile.json"
+
+    subprocess.check_output(
+        ["id3manager", "--profile-output", report_path, "set", test_mp3],
+        input=f"APIC = file://{testdata / 'logo.png'}\n\n00:00:00 Кінець\n".encode(),
+    )
+
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    assert [
+        "load_tags",
+        "apic_load",
+        "duration",
+        "read_metadata",
+        "serialize",
+        "save",
+    ] == list(report["phases"])
+    assert 2 == report["phases"]["serialize"]["calls"]
+    assert all(stats["wall"] >= 0 for stats in report["phases"].values())
+    assert report["peak"] >= report["phases"]["apic_load"]["peak"] > 0
+    assert 1 == report["artwork_cache"]["misses"]
+
+
+def test_profile_set_no_chapters(get_mp3, tmpdir):
+    test_mp3 = get_mp3("metadata.mp3")
+    report_path = tmpdir / "profile.json"
+
+    subprocess.check_output(
+        ["id3manager", "--profile-output", report_path, "set", test_mp3],
+        input="TIT2 = Обробка помилок\n".encode(),
+    )
+
+    report = json.loads(report_path.read_text(encoding="utf-8"))
+    assert "duration" not in report["phases"]
@@ -0,0 +1,71 @@
+import subprocess
+
+import pytest
+
+
+@pytest.fixture(scope="function")
+def database(get_mp3, tmpdir):
+    database = tmpdir / "index.sqlite3"
+    get_mp3("metadata.mp3")
+    get_mp3("no-metadata.mp3")
+    subprocess.check_output(["id3manager", "index", "-d", database, tmpdir])
+    return database
+
+
+@pytest.mark.parametrize(
+    ["query", "matched"],
+    [
+        pytest.param("TIT2", 1, id="exists"),
+        pytest.param("TCON=Podcast AND NOT TLAN", 1, id="and-not"),
+        pytest.param("TCON!=Podcast", 1, id="not-equal"),
+        pytest.param('TALB~"по коду"', 1, id="contains"),
+        pytest.param("TDRC<2023 OR TLAN", 1, id="or"),
+        pytest.param("CHAP>=1 AND (APIC>1000000 OR TIT2=Other)", 0, id="chapters"),
+        pytest.param("NOT (TIT2 OR TPE1)", 1, id="parentheses"),
+    ],
+)
+def test_query_paths(database, query, matched):
+    actual = subprocess.check_output(
+        ["id3manager", "query", "-d", database, "--paths", query]
+    )
+    assert matched == len(actual.decode("utf-8").splitlines())
+
+
+def test_query_metadata(get_mp3, tmpdir):
+    database = tmpdir / "index.sqlite3"
+    test_mp3 = get_mp3("metadata.mp3")
+    subprocess.check_output(["id3manager", "index", "-d", database, tmpdir])
+
+    actual = subprocess.check_output(["id3manager", "query", "-d", database, "CHAP=1"])
+    assert "" == actual.decode("utf-8")
+
+    actual = subprocess.check_output(["id3manager", "query", "-d", database, "CHAP"])
+    assert (
+        f"==> {test_mp3} <==\n"
+        "TIT2 = Обробка помилок\n"
+        "TPE1 = Ігор, Роман\n"
+        "TRCK = 14/14\n"
+        "TALB = Шо по коду?\n"
+        "TDRC = 2022-11-27\n"
+        "TCON = Podcast\n"
+        "TSSE = Lavf59.27.100\n"
+        "\n"
+        "00:00:00 Початок\n"
+    ) == actual.decode("utf-8")
+
+
+@pytest.mark.parametrize(
+    ["query", "error"],
+    [
+        pytest.param("FOO", "Invalid frame: `FOO`", id="frame"),
+        pytest.param("(TIT2", "Unbalanced parentheses", id="parentheses"),
+        pytest.param("TIT2 TPE1", "Unexpected token: `TPE1`", id="token"),
+        pytest.param("CHAP>many", "Invalid number: `many`", id="number"),
+    ],
+)
+def test_query_invalid(database, query, error):
+    process = subprocess.run(
+        ["id3manager", "query", "-d", database, query], capture_output=True
+    )
+    assert 1 == process.returncode
+    assert f"{query}: {error}\n" == process.stderr.decode("utf-8")
@@ -0,0 +1,94 @@
+import os
+import signal
+import subprocess
+import textwrap
+import time
+
+import pytest
+from id3manager import client
+
+
+@pytest.fixture(scope="function")
+def daemon(daemon_socket):
+    process = subprocess.Popen(["id3manager", "serve", "--socket", daemon_socket])
+
+    deadline = time.monotonic() + 10
+    while not client.is_listening(str(daemon_socket)):
+        assert process.poll() is None
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+    yield process
+
+    process.terminate()
+    process.wait(timeout=10)
+
+
+def test_get_set(daemon, daemon_socket, get_mp3):
+    expected = textwrap.dedent(
+        """\
+        TIT2 = Обробка помилок
+        TCON = Podcast
+
+        00:00:00 Кінець
+        """
+    )
+
+    test_mp3 = get_mp3("metadata.mp3")
+    actual = subprocess.check_output(
+        ["id3manager", "set", test_mp3], input=expected.encode("utf-8")
+    )
+    assert f"{test_mp3}: updated\n" == actual.decode("utf-8")
+
+    actual = subprocess.check_output(["id3manager", "get", test_mp3])
+    assert expected == actual.decode("utf-8")
+
+    actual = subprocess.check_output(
+        ["id3manager", "get", "--frames", "TCON", test_mp3]
+    )
+    assert "TCON = Podcast\n" == actual.decode("utf-8")
+
+    response = client.send_request(
+        str(daemon_socket),
+        {"command": "get", "audio": str(test_mp3), "format": "text"},
+    )
+    assert {"output": expected} == response
+
+
+def test_error(daemon, daemon_socket, tmpdir):
+    missing_mp3 = os.path.join(tmpdir, "missing.mp3")
+
+    process = subprocess.run(
+        ["id3manager", "get", missing_mp3], capture_output=True, encoding="utf-8"
+    )
+    assert process.returncode == 1
+    assert process.stderr.startswith(f"{missing_mp3}: ")
+
+    response = client.send_request(str(daemon_socket), {"command": "get"})
+    assert {"error": "invalid request: missing 'audio'"} == response
+
+
+def test_already_running(daemon, daemon_socket):
+    process = subprocess.run(
+        ["id3manager", "serve", "--socket", daemon_socket],
+        capture_output=True,
+        encoding="utf-8",
+    )
+    assert process.returncode == 1
+    assert f"{daemon_socket}: daemon is already running\n" == process.stderr
+
+
+def test_stale_socket(daemon, daemon_socket, get_mp3):
+    daemon.send_signal(signal.SIGKILL)
+    daemon.wait(timeout=10)
+    assert os.path.exists(daemon_socket)
+
+    test_mp3 = get_mp3("metadata.mp3")
+    actual = subprocess.check_output(["id3manager", "get", test_mp3])
+    assert actual.decode("utf-8").startswith("TIT2 = Обробка помилок\n")
+
+
+def test_terminate_removes_socket(daemon, daemon_socket):
+    daemon.terminate()
+    assert daemon.wait(timeout=10) == 0
+    assert not os.path.exists(daemon_socket)
@@ -1,7 +1,11 @@
 import base64
+import json
+import os
 import subprocess
 import textwrap
 
+import pytest
+
 
 def test_text_metadata(get_mp3):
     expected = textwrap.dedent(
@@ -175,6 +179,35 @@ def test_text_metadata_apic_file(get_mp3, testdata):
     assert expected == actual.decode("utf-8")
 
 
+@pytest.mark.parametrize(
+    ["picture_type", "expected_picture_type"],
+    [
+        pytest.param(" COVER_BACK", " COVER_BACK", id="picture-type"),
+        pytest.param("", " COVER_FRONT", id="no-picture-type"),
+    ],
+)
+def test_text_metadata_apic_data_large(get_mp3, picture_type, expected_picture_type):
+    # Pictures much larger than a read chunk are decoded chunk by chunk.
+    image_data = base64.b64encode(os.urandom(300 * 1024)).decode()
+    document = textwrap.dedent(
+        f"""\
+        TIT2 = {"Обробка помилок" * 10000}
+        APIC = data:image/png;base64,{image_data}{{picture_type}}
+
+        00:00:00 Кінець
+        """
+    )
+
+    test_mp3 = get_mp3("metadata.mp3")
+    subprocess.check_output(
+        ["id3manager", "set", test_mp3],
+        input=document.format(picture_type=picture_type).encode("utf-8"),
+    )
+
+    actual = subprocess.check_output(["id3manager", "get", test_mp3])
+    assert document.format(picture_type=expected_picture_type) == actual.decode("utf-8")
+
+
 def test_text_metadata_apic_data(get_mp3):
     expected = textwrap.dedent(
         """\
@@ -813,3 +846,396 @@ def test_toml_no_metadata(get_mp3):
 
     actual = subprocess.check_output(["id3manager", "-f", "toml", "get", test_mp3])
     assert expected == actual.decode("utf-8")
+
+
+def test_jsonl_metadata(get_mp3):
+    expected = textwrap.dedent(
+        """\
+        {"id":"TIT2","text":["Обробка помилок"]}
+        {"id":"TPE1","text":["Ігор","Роман"]}
+        {"id":"TXXX","text":["14"],"desc":"episode"}
+        {"id":"COMM","text":["Про винятки"],"desc":"","lang":"ukr"}
+        {"id":"WXXX","url":"https://shopokodu.com","desc":"podcast"}
+        {"id":"APIC","mime":"image/png","type":3,"desc":"","data":"iVBORw0KGgo="}
+        {"id":"CHAP","element_id":"chapter#0","start_time":0,"end_time":1000,"sub_frames":[{"id":"TIT2","text":["Початок"]}]}
+        {"id":"CHAP","element_id":"chapter#1","start_time":1000,"end_time":5041,"sub_frames":[{"id":"TIT2","text":["Кінець"]}]}
+        {"id":"CTOC","element_id":"toc","flags":3,"child_element_ids":["chapter#0","chapter#1"],"sub_frames":[{"id":"TIT2","text":["Розділи"]}]}
+        """  # noqa: E501
+    )
+
+    test_mp3 = get_mp3("metadata.mp3")
+    subprocess.check_output(
+        ["id3manager", "-f", "jsonl", "set", test_mp3], input=expected.encode("utf-8")
+    )
+
+    actual = subprocess.check_output(["id3manager", "-f", "jsonl", "get", test_mp3])
+    assert expected == actual.decode("utf-8")
+
+
+def test_jsonl_metadata_unchanged(get_mp3):
+    test_mp3 = get_mp3("metadata.mp3")
+    metadata = subprocess.check_output(["id3manager", "-f", "jsonl", "get", test_mp3])
+
+    os.utime(test_mp3, ns=(0, 0))
+    actual = subprocess.check_output(
+        ["id3manager", "-f", "jsonl", "set", test_mp3], input=metadata
+    )
+    assert f"{test_mp3}: unchanged\n" == actual.decode("utf-8")
+    assert test_mp3.stat().st_mtime_ns == 0
+
+
+def test_text_manifest(get_mp3, tmpdir):
+    test_mp3s = [get_mp3("metadata.mp3"), get_mp3("no-metadata.mp3")]
+    expected = [
+        textwrap.dedent(
+            f"""\
+            TIT2 = Епізод {idx}
+            TCON = Podcast
+
+            00:00:00 Початок
+            """
+        )
+        for idx in range(len(test_mp3s))
+    ]
+
+    manifest = tmpdir / "manifest.jsonl"
+    with manifest.open("w") as fp:
+        for idx, test_mp3 in enumerate(test_mp3s):
+            (tmpdir / f"{idx}.txt").write_text(expected[idx], encoding="utf-8")
+            print(
+                json.dumps({"audio": test_mp3.name, "metadata": f"{idx}.txt"}), file=fp
+            )
+
+    subprocess.check_output(
+        ["id3manager", "set", "--manifest", manifest, "--jobs", "2"]
+    )
+
+    for idx, test_mp3 in enumerate(test_mp3s):
+        actual = subprocess.check_output(["id3manager", "get", test_mp3])
+        assert expected[idx] == actual.decode("utf-8")
+
+
+def test_toml_manifest_sidecars(get_mp3):
+    test_mp3 = get_mp3("no-metadata.mp3")
+    expected = textwrap.dedent(
+        """\
+        [[TIT2]]
+        text = "Обробка помилок"
+
+        [[CHAP]]
+        text = "Кінець"
+        timestamp = "00:00:00"
+        """
+    )
+    test_mp3.with_suffix(".toml").write_text(expected, encoding="utf-8")
+
+    subprocess.check_output(
+        ["id3manager", "-f", "toml", "set", "--manifest", test_mp3.parent]
+    )
+
+    actual = subprocess.check_output(["id3manager", "-f", "toml", "get", test_mp3])
+    assert expected == actual.decode("utf-8")
+
+
+def test_text_manifest_partial_failure(get_mp3):
+    test_mp3_ok = get_mp3("no-metadata.mp3")
+    test_mp3_bad = get_mp3("no-metadata.mp3")
+    expected = textwrap.dedent(
+        """\
+        TIT2 = Обробка помилок
+
+        00:00:00 Кінець
+        """
+    )
+    test_mp3_ok.with_suffix(".txt").write_text(expected, encoding="utf-8")
+    test_mp3_bad.with_suffix(".txt").write_text(
+        "APIC = data:;gzip,SGVsbG8=\n\n00:00:00 Кінець\n", encoding="utf-8"
+    )
+
+    completed = subprocess.run(
+        ["id3manager", "set", "--manifest", test_mp3_ok.parent], capture_output=True
+    )
+    assert completed.returncode == 1
+    assert str(test_mp3_bad) in completed.stderr.decode("utf-8")
+
+    actual = subprocess.check_output(["id3manager", "get", test_mp3_ok])
+    assert expected == actual.decode("utf-8")
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_text_manifest_invalid_entry(get_mp3, tmpdir, jobs):
+    test_mp3 = get_mp3("no-metadata.mp3")
+    expected = "TIT2 = Обробка помилок\n"
+    (tmpdir / "ok.txt").write_text(expected, encoding="utf-8")
+
+    manifest = tmpdir / "manifest.jsonl"
+    manifest.write_text(
+        json.dumps({"audio": test_mp3.name, "metadata": "ok.txt"}) + "\n"
+        '{"audio": "bad.mp3"}\n',
+        encoding="utf-8",
+    )
+
+    completed = subprocess.run(
+        ["id3manager", "set", "--manifest", manifest, "--jobs", jobs],
+        capture_output=True,
+    )
+    assert completed.returncode == 1
+    assert f"{test_mp3}: updated\n" == completed.stdout.decode("utf-8")
+    assert f"{manifest}:2: invalid manifest entry\n" == completed.stderr.decode("utf-8")
+
+    actual = subprocess.check_output(["id3manager", "get", test_mp3])
+    assert expected == actual.decode("utf-8")
+
+
+def test_manifest_and_audio_are_exclusive(get_mp3, tmpdir):
+    test_mp3 = get_mp3("metadata.mp3")
+    completed = subprocess.run(
+        ["id3manager", "set", "--manifest", tmpdir, test_mp3], capture_output=True
+    )
+
+    assert completed.returncode == 2
+
+
+def test_text_metadata_unchanged(get_mp3):
+    test_mp3 = get_mp3("metadata.mp3")
+    metadata = textwrap.dedent(
+        """\
+        TIT2 = Обробка помилок
+        TCON = Podcast
+
+        00:00:00 Початок
+        00:00:01 Кінець
+        """
+    ).encode("utf-8")
+
+    actual = subprocess.check_output(["id3manager", "set", test_mp3], input=metadata)
+    assert f"{test_mp3}: updated\n" == actual.decode("utf-8")
+
+    os.utime(test_mp3, ns=(0, 0))
+    actual = subprocess.check_output(["id3manager", "set", test_mp3], input=metadata)
+    assert f"{test_mp3}: unchanged\n" == actual.decode("utf-8")
+    assert test_mp3.stat().st_mtime_ns == 0
+
+    metadata = metadata.replace("Кінець".encode("utf-8"), "Висновок".encode("utf-8"))
+    actual = subprocess.check_output(["id3manager", "set", test_mp3], input=metadata)
+    assert f"{test_mp3}: updated\n" == actual.decode("utf-8")
+    assert test_mp3.stat().st_mtime_ns != 0
+
+
+def test_text_metadata_no_chapters(get_mp3):
+    expected = textwrap.dedent(
+        """\
+        TIT2 = Обробка помилок
+        TCON = Podcast
+        """
+    )
+
+    test_mp3 = get_mp3("metadata.mp3")
+    subprocess.check_output(
+        ["id3manager", "set", test_mp3], input=expected.encode("utf-8")
+    )
+
+    actual = subprocess.check_output(["id3manager", "get", test_mp3])
+    assert expected == actual.decode("utf-8")
+
+
+def test_toml_metadata_multiline_string(get_mp3):
+    metadata = textwrap.dedent(
+        '''\
+        [[TIT2]]
+        text = """Обробка помилок
+        [[TALB]]"""
+
+        [[CHAP]]
+        text = "Кінець"
+        timestamp = "00:00:00"
+        '''
+    )
+    expected = textwrap.dedent(
+        """\
+        [[TIT2]]
+        text = "Обробка помилок\\n[[TALB]]"
+
+        [[CHAP]]
+        text = "Кінець"
+        timestamp = "00:00:00"
+        """
+    )
+
+    test_mp3 = get_mp3("metadata.mp3")
+    subprocess.check_output(
+        ["id3manager", "-f", "toml", "set", test_mp3], input=metadata.encode("utf-8")
+    )
+
+    actual = subprocess.check_output(["id3manager", "-f", "toml", "get", test_mp3])
+    assert expected == actual.decode("utf-8")
+
+
+def test_toml_metadata_multiline_string_escaped_quotes(get_mp3):
+    metadata = textwrap.dedent(
+        '''\
+        [[TIT2]]
+        text = """Обробка \\""" помилок
+        [[TALB]]"""
+
+        [[CHAP]]
+        text = "Кінець"
+        timestamp = "00:00:00"
+        '''
+    )
+    expected = textwrap.dedent(
+        """\
+        [[TIT2]]
+        text = "Обробка \\"\\"\\" помилок\\n[[TALB]]"
+
+        [[CHAP]]
+        text = "Кінець"
+        timestamp = "00:00:00"
+        """
+    )
+
+    test_mp3 = get_mp3("metadata.mp3")
+    subprocess.check_output(
+        ["id3manager", "-f", "toml", "set", test_mp3], input=metadata.encode("utf-8")
+    )
+
+    actual = subprocess.check_output(["id3manager", "-f", "toml", "get", test_mp3])
+    assert expected == actual.decode("utf-8")
+
+
+def test_toml_metadata_invalid(get_mp3):
+    metadata = textwrap.dedent(
+        """\
+        [[TIT2]]
+        text =
+
+        [[CHAP]]
+        text = "Кінець"
+        timestamp = "00:00:00"
+        """
+    )
+
+    test_mp3 = get_mp3("metadata.mp3")
+    result = subprocess.run(
+        ["id3manager", "-f", "toml", "set", test_mp3],
+        input=metadata.encode("utf-8"),
+        capture_output=True,
+    )
+    assert result.returncode == 1
+    assert str(test_mp3) in result.stderr.decode("utf-8")
+
+
+def test_toml_metadata_escapes(get_mp3):
+    metadata = textwrap.dedent(
+        """\
+        [[TIT2]]
+        text = "\\"Обробка\\" \\\\ помилок\\t\\u0001\\u007f"
+
+        [[TALB]]
+        text = 'Шо по "коду"?'
+
+        [[CHAP]]
+        text = "Кінець"
+        timestamp = "00:00:00"
+        """
+    )
+    expected = textwrap.dedent(
+        """\
+        [[TIT2]]
+        text = "\\"Обробка\\" \\\\ помилок\\t\\u0001\\u007f"
+
+        [[TALB]]
+        text = "Шо по \\"коду\\"?"
+
+        [[CHAP]]
+        text = "Кінець"
+        timestamp = "00:00:00"
+        """
+    )
+
+    test_mp3 = get_mp3("metadata.mp3")
+    subprocess.check_output(
+        ["id3manager", "-f", "toml", "set", test_mp3], input=metadata.encode("utf-8")
+    )
+
+    actual = subprocess.check_output(["id3manager", "-f", "toml", "get", test_mp3])
+    assert expected == actual.decode("utf-8")
+
+
+def test_text_merge(get_mp3):
+    test_mp3 = get_mp3("metadata.mp3")
+    subprocess.check_output(
+        ["id3manager", "set", "--merge", test_mp3],
+        input="TALB = Шо по коду? Сезон 2\nTLAN = ukr\n".encode("utf-8"),
+    )
+
+    actual = subprocess.check_output(["id3manager", "get", test_mp3])
+    assert (
+        textwrap.dedent(
+            """\
+            TIT2 = Обробка помилок
+            TPE1 = Ігор, Роман
+            TRCK = 14/14
+            TALB = Шо по коду? Сезон 2
+            TDRC = 2022-11-27
+            TCON = Podcast
+            TSSE = Lavf59.27.100
+            TLAN = ukr
+
+            00:00:00 Початок
+            """
+        )
+        == actual.decode("utf-8")
+    )
+
+
+def test_text_merge_chapters(get_mp3):
+    test_mp3 = get_mp3("metadata.mp3")
+    subprocess.check_output(
+        ["id3manager", "set", "--merge", test_mp3],
+        input="\n00:00:00 Початок\n00:00:01 Кінець\n".encode("utf-8"),
+    )
+
+    actual = subprocess.check_output(["id3manager", "get", test_mp3])
+    assert (
+        textwrap.dedent(
+            """\
+            TIT2 = Обробка помилок
+            TPE1 = Ігор, Роман
+            TRCK = 14/14
+            TALB = Шо по коду?
+            TDRC = 2022-11-27
+            TCON = Podcast
+            TSSE = Lavf59.27.100
+
+            00:00:00 Початок
+            00:00:01 Кінець
+            """
+        )
+        == actual.decode("utf-8")
+    )
+
+    output = subprocess.check_output(
+        ["id3manager", "set", "--merge", test_mp3], input=b""
+    )
+    assert f"{test_mp3}: unchanged\n" == output.decode("utf-8")
+
+
+def test_jsonl_metadata_chapters(get_mp3):
+    # Chapters are kept as they are, rather than being regenerated.
+    expected = textwrap.dedent(
+        """\
+        {"id":"TIT2","text":["Обробка помилок"]}
+        {"id":"CTOC","element_id":"contents","flags":1,"child_element_ids":["intro","outro"],"sub_frames":[{"id":"TIT2","text":["Зміст"]}]}
+        {"id":"CHAP","element_id":"intro","start_time":0,"end_time":800,"sub_frames":[{"id":"TIT2","text":["Початок"]},{"id":"WXXX","url":"https://shopokodu.com","desc":"chapter"}]}
+        {"id":"CHAP","element_id":"outro","start_time":1000,"end_time":3000,"sub_frames":[{"id":"TIT2","text":["Кінець"]}]}
+        """  # noqa: E501
+    )
+
+    test_mp3 = get_mp3("metadata.mp3")
+    subprocess.check_output(
+        ["id3manager", "-f", "jsonl", "set", test_mp3], input=expected.encode("utf-8")
+    )
+
+    actual = subprocess.check_output(["id3manager", "-f", "jsonl", "get", test_mp3])
+    assert expected == actual.decode("utf-8")
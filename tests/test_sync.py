@@ -0,0 +1,72 @@
+import pathlib
+import subprocess
+
+
+def sync(*args):
+    process = subprocess.run(
+        ["id3manager", "sync", *map(str, args)], capture_output=True, encoding="utf-8"
+    )
+    return process.returncode, process.stdout.splitlines()
+
+
+def test_sync(get_mp3, tmpdir, cache_home):
+    directory = pathlib.Path(tmpdir.strpath)
+    first_mp3 = get_mp3("metadata.mp3")
+    second_mp3 = get_mp3("no-metadata.mp3")
+    get_mp3("metadata.mp3")
+    first_mp3.with_suffix(".txt").write_text("TIT2 = Перший\n", encoding="utf-8")
+    second_mp3.with_suffix(".txt").write_text("TIT2 = Другий\n", encoding="utf-8")
+
+    returncode, lines = sync(directory)
+    assert returncode == 0
+    assert "2 updated, 0 unchanged, 0 skipped, 0 failed" == lines[-1]
+    assert list((cache_home / "id3manager" / "sync").glob("*.json"))
+
+    returncode, lines = sync(directory)
+    assert returncode == 0
+    assert ["0 updated, 0 unchanged, 2 skipped, 0 failed"] == lines
+
+    first_mp3.with_suffix(".txt").write_text("TIT2 = Змінений\n", encoding="utf-8")
+    returncode, lines = sync(directory)
+    assert returncode == 0
+    assert [
+        f"{first_mp3}: updated",
+        "1 updated, 0 unchanged, 1 skipped, 0 failed",
+    ] == lines
+
+    actual = subprocess.check_output(["id3manager", "get", first_mp3])
+    assert "TIT2 = Змінений\n" == actual.decode("utf-8")
+
+
+def test_sync_audio_changed(get_mp3, testdata, tmpdir):
+    state = pathlib.Path(tmpdir.strpath) / "state.json"
+    test_mp3 = get_mp3("metadata.mp3")
+    test_mp3.with_suffix(".txt").write_text("TIT2 = Перший\n", encoding="utf-8")
+
+    assert 0 == sync("--state", state, tmpdir)[0]
+
+    # The audio file is replaced, e.g. by a deploy, but the document is not.
+    test_mp3.write_bytes((testdata / "metadata.mp3").read_bytes())
+    returncode, lines = sync("--state", state, tmpdir)
+    assert returncode == 0
+    assert "1 updated, 0 unchanged, 0 skipped, 0 failed" == lines[-1]
+
+
+def test_sync_failed_retried(get_mp3, tmpdir):
+    state = pathlib.Path(tmpdir.strpath) / "state.json"
+    test_mp3 = get_mp3("metadata.mp3")
+    test_mp3.with_suffix(".txt").write_text("TIT2\n", encoding="utf-8")
+
+    returncode, lines = sync("--state", state, tmpdir)
+    assert returncode == 1
+    assert "0 updated, 0 unchanged, 0 skipped, 1 failed" == lines[-1]
+
+    test_mp3.with_suffix(".txt").write_text("TIT2 = Виправлений\n", encoding="utf-8")
+    returncode, lines = sync("--state", state, tmpdir)
+    assert returncode == 0
+    assert "1 updated, 0 unchanged, 0 skipped, 0 failed" == lines[-1]
+
+
+def test_sync_not_directory(get_mp3):
+    returncode, _ = sync(get_mp3("metadata.mp3"))
+    assert returncode == 2
@@ -0,0 +1,78 @@
+import os
+import pathlib
+import selectors
+import subprocess
+import sys
+
+import pytest
+
+
+def readline(stream, timeout=10):
+    with selectors.DefaultSelector() as selector:
+        selector.register(stream, selectors.EVENT_READ)
+        assert selector.select(timeout), "timed out"
+    return stream.readline()
+
+
+@pytest.fixture(
+    scope="function",
+    params=[
+        pytest.param(
+            "inotify",
+            marks=pytest.mark.skipif(
+                sys.platform != "linux", reason="inotify is Linux only"
+            ),
+        ),
+        "polling",
+    ],
+)
+def watcher(request, tmpdir):
+    options = ["--poll"] if request.param == "polling" else []
+    process = subprocess.Popen(
+        ["id3manager", "watch", "--debounce", "0.1", *options, tmpdir],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        encoding="utf-8",
+    )
+    assert f"{tmpdir}: watching for changes ({request.param})\n" == readline(
+        process.stderr
+    )
+
+    yield process
+
+    process.terminate()
+    process.wait(timeout=10)
+    process.stdout.close()
+    process.stderr.close()
+
+
+def test_watch(watcher, get_mp3, tmpdir):
+    test_mp3 = get_mp3("metadata.mp3")
+    subdir = pathlib.Path(tmpdir.strpath) / "season"
+    subdir.mkdir()
+    other_mp3 = subdir / "other.mp3"
+    os.rename(get_mp3("no-metadata.mp3"), other_mp3)
+
+    test_mp3.with_suffix(".txt").write_text("TIT2 = Перший\n", encoding="utf-8")
+    assert f"{test_mp3}: updated\n" == readline(watcher.stdout)
+
+    # A burst of writes is applied once, when it settles.
+    with open(other_mp3.with_suffix(".txt"), "w", encoding="utf-8") as fp:
+        fp.write("TIT2 = Другий\n")
+    other_mp3.with_suffix(".txt").write_text("TIT2 = Третій\n", encoding="utf-8")
+    assert f"{other_mp3}: updated\n" == readline(watcher.stdout)
+
+    actual = subprocess.check_output(["id3manager", "get", test_mp3])
+    assert "TIT2 = Перший\n" == actual.decode("utf-8")
+    actual = subprocess.check_output(["id3manager", "get", other_mp3])
+    assert "TIT2 = Третій\n" == actual.decode("utf-8")
+
+
+def test_watch_error(watcher, get_mp3):
+    test_mp3 = get_mp3("metadata.mp3")
+
+    test_mp3.with_suffix(".txt").write_text("TIT2\n", encoding="utf-8")
+    assert readline(watcher.stderr).startswith(f"{test_mp3}: ")
+
+    test_mp3.with_suffix(".txt").write_text("TIT2 = Виправлений\n", encoding="utf-8")
+    assert f"{test_mp3}: updated\n" == readline(watcher.stdout)